@@ -0,0 +1,66 @@
+# Lettura dei pulsanti in un colpo solo e debouncing a contatori verticali
+#
+# Su RP2 i pin si leggono tutti insieme dal registro GPIO_IN del blocco SIO
+# (una sola lettura a 32 bit, nessuna chiamata Pin.value()). Il debouncing
+# tiene per ogni pulsante un contatore a 2 bit "verticale": bit 0 e bit 1 di
+# tutti i pulsanti stanno in due interi, cosi' ogni campione costa poche
+# operazioni logiche indipendentemente dal numero di pulsanti.
+
+import sys
+
+SIO_BASE = 0xD0000000
+GPIO_IN = SIO_BASE + 0x004
+
+
+class GpioSnapshot:
+    """Maschera dei pulsanti premuti (bit i = pins[i]), attivi bassi (PULL_UP)"""
+
+    def __init__(self, pins, gpio_numbers):
+        self.pins = pins
+        self.width = len(pins)
+        self.all = (1 << self.width) - 1
+        self.shift = gpio_numbers[0]
+        # lettura diretta solo su RP2 e con pin consecutivi nell'ordine dei bit
+        consecutive = list(gpio_numbers) == list(range(self.shift, self.shift + self.width))
+        self.mem32 = None
+        if sys.platform == "rp2" and consecutive:
+            from machine import mem32
+            self.mem32 = mem32
+
+    def read(self):
+        if self.mem32 is not None:
+            return (~self.mem32[GPIO_IN] >> self.shift) & self.all
+        mask = 0
+        for i, pin in enumerate(self.pins):
+            if pin.value() == 0:
+                mask |= 1 << i
+        return mask
+
+
+class VerticalCounter:
+    """Debouncing di tutti i bit in parallelo.
+
+    Un bit cambia stato dopo 4 campioni consecutivi diversi dallo stato
+    attuale (~20 ms con il loop a 5 ms); update() restituisce le maschere
+    dei fronti di pressione e di rilascio.
+    """
+
+    def __init__(self, width):
+        self.all = (1 << width) - 1
+        self.state = 0
+        self.cnt0 = 0
+        self.cnt1 = 0
+
+    def update(self, sample):
+        delta = (sample ^ self.state) & self.all
+        # i contatori dei bit stabili tornano a zero, gli altri avanzano
+        self.cnt1 = (self.cnt1 ^ self.cnt0) & delta
+        self.cnt0 = ~self.cnt0 & delta
+        toggle = delta & ~(self.cnt0 | self.cnt1)
+        self.state ^= toggle
+        return toggle & self.state, toggle & ~self.state
+
+    def reset(self, state=0):
+        self.state = state & self.all
+        self.cnt0 = 0
+        self.cnt1 = 0
@@ -0,0 +1,79 @@
+# Garbage collection solo nei momenti morti del gioco
+#
+# La soglia automatica (gc.threshold) viene alzata, cosi' durante sequenza
+# e risposta del giocatore non partono collezioni: il gioco chiama idle()
+# in lobby, tra un livello e l'altro e dopo il game over. poll() resta come
+# valvola di sicurezza se la memoria libera scende sotto low_water; poiche'
+# gc.mem_free() scorre tutto l'heap, il controllo avviene al piu' ogni
+# poll_interval_ms.
+
+import gc
+import time
+
+
+class GcPolicy:
+    def __init__(self, low_water=16 * 1024, idle_interval_ms=2000, min_alloc=4 * 1024,
+                 poll_interval_ms=250):
+        self.low_water = low_water
+        self.idle_interval_ms = idle_interval_ms
+        self.min_alloc = min_alloc
+        self.poll_interval_ms = poll_interval_ms
+        # CPython (strumenti host) non ha mem_free/threshold: policy inattiva
+        self.enabled = hasattr(gc, "mem_free")
+        self.count = 0
+        self.forced = 0
+        self.total_us = 0
+        self.max_us = 0
+        self.last_us = 0
+        self.last_check = 0
+        self.last_alloc = 0
+        self.last_poll = 0
+        if self.enabled:
+            self.collect()
+            # la collezione automatica scatta solo dopo 3/4 della RAM libera
+            gc.threshold(gc.mem_free() * 3 // 4)
+
+    def collect(self):
+        t0 = time.ticks_us()
+        gc.collect()
+        elapsed = time.ticks_diff(time.ticks_us(), t0)
+        self.count += 1
+        self.total_us += elapsed
+        self.last_us = elapsed
+        if elapsed > self.max_us:
+            self.max_us = elapsed
+        self.last_check = time.ticks_ms()
+        self.last_alloc = gc.mem_alloc()
+
+    def idle(self, force=False):
+        """Finestra libera: collezione se c'e' abbastanza garbage nuovo"""
+        if not self.enabled:
+            return
+        if not force:
+            now = time.ticks_ms()
+            if time.ticks_diff(now, self.last_check) < self.idle_interval_ms:
+                return
+            # anche mem_alloc() scorre l'heap: al piu' un controllo per intervallo
+            self.last_check = now
+            if gc.mem_alloc() - self.last_alloc < self.min_alloc:
+                return
+        self.collect()
+
+    def poll(self):
+        """Valvola di sicurezza, da chiamare a ogni giro di loop"""
+        if not self.enabled:
+            return
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self.last_poll) < self.poll_interval_ms:
+            return
+        self.last_poll = now
+        if gc.mem_free() < self.low_water:
+            self.forced += 1
+            self.collect()
+
+    def report(self):
+        if not self.enabled or not self.count:
+            return
+        print(f"gc: {self.count} collezioni ({self.forced} forzate) "
+              f"media {self.total_us // self.count}us max {self.max_us}us "
+              f"ultima {self.last_us}us free {gc.mem_free()}")
@@ -0,0 +1,287 @@
+# Registrazione compatta delle partite e replay deterministico
+#
+# Formato: ogni segmento inizia con MAGIC, poi eventi
+#   tag (1 byte: tipo << 4 | payload) + delta ms dall'evento precedente (varint)
+# SEED aggiunge 2 byte (seed little endian). I segmenti sono due file
+# (<path>.0 attivo, <path>.1 precedente): lo spazio in flash resta limitato.
+
+import os
+import time
+
+MAGIC = b"TIGT\x01"
+
+EV_BUTTONS = 0   # payload: maschera dei pulsanti premuti
+EV_STATE = 1     # payload: nuovo stato di gioco
+EV_SEED = 2      # + 2 byte: seed della sequenza della partita
+EV_NET = 3       # payload: is_top_record restituito da end-game
+EV_SESSION = 4   # payload: 1 se online
+EV_TIMEOUT = 5   # il giocatore non ha risposto in tempo
+
+LOOP_MS = 5      # durata virtuale di un giro di loop() nel replay
+# una partita intera sta nel buffer: con i rimbalzi si arriva a ~17 byte
+# per pressione, 8 KB coprono una partita fino al livello 30 circa
+_BUF_SIZE = 8192
+
+
+def _exists(path):
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+
+class Recorder:
+    """Scrive gli eventi in un buffer fisso e li riversa in flash con flush().
+
+    Il gioco chiama flush() solo a GAME_OVER e in LOBBY: durante la partita
+    non si scrive mai in flash. A buffer pieno gli eventi vengono scartati e
+    contati in dropped.
+    """
+
+    def __init__(self, path="trace", segment_bytes=8192):
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.buf = bytearray(_BUF_SIZE)
+        self.n = 0
+        self.dropped = 0
+        self.last = time.ticks_ms()
+        active = path + ".0"
+        if _exists(active):
+            self.size = os.stat(active)[6]
+        else:
+            self._new_segment()
+
+    def _new_segment(self):
+        with open(self.path + ".0", "wb") as f:
+            f.write(MAGIC)
+        self.size = len(MAGIC)
+
+    def _rotate(self):
+        old = self.path + ".1"
+        if _exists(old):
+            os.remove(old)
+        os.rename(self.path + ".0", old)
+        self._new_segment()
+
+    def _event(self, kind, payload, seed=None):
+        if self.n > _BUF_SIZE - 8:
+            # niente flash qui: siamo dentro il loop di gioco
+            self.dropped += 1
+            return
+        now = time.ticks_ms()
+        delta = time.ticks_diff(now, self.last)
+        self.last = now
+        buf = self.buf
+        n = self.n
+        buf[n] = (kind << 4) | (payload & 0x0F)
+        n += 1
+        while delta >= 0x80:
+            buf[n] = (delta & 0x7F) | 0x80
+            delta >>= 7
+            n += 1
+        buf[n] = delta
+        n += 1
+        if seed is not None:
+            buf[n] = seed & 0xFF
+            buf[n + 1] = (seed >> 8) & 0xFF
+            n += 2
+        self.n = n
+
+    def session(self, online):
+        self._event(EV_SESSION, 1 if online else 0)
+
+    def buttons(self, mask):
+        self._event(EV_BUTTONS, mask)
+
+    def state(self, state):
+        self._event(EV_STATE, state)
+
+    def seed(self, seed):
+        self._event(EV_SEED, 0, seed)
+
+    def net(self, is_top_record):
+        self._event(EV_NET, 1 if is_top_record else 0)
+
+    def timeout(self):
+        self._event(EV_TIMEOUT, 0)
+
+    def flush(self):
+        if self.dropped:
+            print(f"trace: buffer pieno, {self.dropped} eventi persi")
+            self.dropped = 0
+        if not self.n:
+            return
+        if self.size + self.n > self.segment_bytes:
+            self._rotate()
+        with open(self.path + ".0", "ab") as f:
+            f.write(memoryview(self.buf)[:self.n])
+        self.size += self.n
+        self.n = 0
+
+
+def read_events(path="trace"):
+    """Eventi (t_ms, tipo, payload, seed) dal segmento vecchio al nuovo.
+
+    Un segmento troncato (es. mancanza di corrente) termina all'ultimo
+    evento completo.
+    """
+    t = 0
+    for name in (path + ".1", path + ".0"):
+        if not _exists(name):
+            continue
+        with open(name, "rb") as f:
+            data = f.read()
+        if data[:len(MAGIC)] != MAGIC:
+            continue
+        i = len(MAGIC)
+        end = len(data)
+        while i < end:
+            tag = data[i]
+            i += 1
+            delta = shift = 0
+            while i < end:
+                b = data[i]
+                i += 1
+                delta |= (b & 0x7F) << shift
+                shift += 7
+                if not b & 0x80:
+                    break
+            else:
+                break
+            kind = tag >> 4
+            seed = None
+            if kind == EV_SEED:
+                if i + 2 > end:
+                    break
+                seed = data[i] | (data[i + 1] << 8)
+                i += 2
+            t += delta
+            yield t, kind, tag & 0x0F, seed
+
+
+def split_games(events):
+    """Divide gli eventi in partite: da un SEED al ritorno in LOBBY.
+
+    Ogni partita e' un dict con online, seed, maschera iniziale dei
+    pulsanti e gli eventi successivi.
+    """
+    games = []
+    online = False
+    mask = 0
+    current = None
+    for event in events:
+        t, kind, payload, seed = event
+        if kind == EV_SESSION:
+            online = bool(payload)
+            current = None
+        elif kind == EV_SEED:
+            current = {"online": online, "seed": seed, "start": t,
+                       "mask": mask, "events": []}
+            games.append(current)
+            continue
+        elif kind == EV_BUTTONS:
+            mask = payload
+        if current is not None:
+            current["events"].append(event)
+            if kind == EV_STATE and payload == 0:
+                current = None
+    return games
+
+
+class Replay:
+    """Rigioca una partita registrata con un orologio virtuale.
+
+    Sostituisce orologio, sleep, lettura dei pulsanti e risultati di rete
+    del gioco; fa da sink degli eventi per confrontare le transizioni di
+    stato con quelle registrate.
+    """
+
+    def __init__(self, game, recorded):
+        self.game = game
+        self.recorded = recorded
+        self.now = 0
+        self.mask = recorded["mask"]
+        self.net_results = [p for _, k, p, _ in recorded["events"] if k == EV_NET]
+        self.expected = [(t - recorded["start"], p)
+                         for t, k, p, _ in recorded["events"] if k == EV_STATE]
+        self.observed = []
+        self.loops = 0
+
+    # sink degli eventi (al posto del Recorder)
+    def session(self, online):
+        pass
+
+    def buttons(self, mask):
+        pass
+
+    def seed(self, seed):
+        pass
+
+    def net(self, is_top_record):
+        pass
+
+    def timeout(self):
+        pass
+
+    def state(self, state):
+        self.observed.append((self.now, state))
+
+    def flush(self):
+        pass
+
+    def _sleep_ms(self, ms):
+        self.now += ms
+
+    def _end_game_result(self):
+        result = self.net_results.pop(0) if self.net_results else 0
+        return bool(result)
+
+    def run(self, max_ms=3600000):
+        game = self.game
+        states = game.GameStates
+        game.trace = self
+        game.online = self.recorded["online"]
+        game.millis = lambda: self.now
+        game.sleep_ms = self._sleep_ms
+        game.sample_buttons = lambda: self.mask
+        game.draw_seed = lambda: self.recorded["seed"]
+        game.end_game_result = self._end_game_result
+        game.game_started_async = lambda: None
+        game.get_top_score_async = lambda: None
+        game.submit_name = lambda game_id, nome: None
+        game.game_session = "replay"
+        game.level = 1
+        # all'avvio della partita (dopo ~2 s di lampeggio) i timer sono scaduti
+        game.timer_playing = game.timer_pause = -10000
+        game.reset_button_states()
+        game.change_game_state(states.SEQUENCE_CREATE_UPDATE)
+        self.observed = []  # registrata prima del SEED, non fa parte della partita
+
+        events = [(t - self.recorded["start"], p)
+                  for t, k, p, _ in self.recorded["events"] if k == EV_BUTTONS]
+        started = time.ticks_ms()
+        i = 0
+        while self.now < max_ms:
+            while i < len(events) and events[i][0] <= self.now:
+                self.mask = events[i][1]
+                i += 1
+            game.loop()
+            self.loops += 1
+            if game.game_state == states.LOBBY:
+                break
+            self.now += LOOP_MS
+        self.wall_ms = time.ticks_diff(time.ticks_ms(), started)
+        return self.matches()
+
+    def matches(self):
+        return [s for _, s in self.observed] == [s for _, s in self.expected]
+
+    def report(self):
+        drift = 0
+        for (t0, _), (t1, _) in zip(self.expected, self.observed):
+            drift = max(drift, abs(t1 - t0))
+        speed = self.now / self.wall_ms if self.wall_ms else 0
+        print(f"seed {self.recorded['seed']}: {'OK' if self.matches() else 'DIVERGE'} "
+              f"stati {len(self.observed)}/{len(self.expected)} drift max {drift}ms "
+              f"virtuale {self.now}ms reale {self.wall_ms}ms (x{speed:.0f})")
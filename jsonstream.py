@@ -0,0 +1,213 @@
+# Parser JSON in streaming che estrae solo i campi richiesti
+#
+# Legge dal socket a blocchi fissi e scorre il documento senza costruire
+# l'albero: le chiavi vengono decodificate solo lungo i percorsi richiesti e
+# solo i valori scalari richiesti vengono copiati (con lunghezza massima).
+# La memoria usata non dipende dalla dimensione del body.
+
+CHUNK = 64
+MAX_STR = 40  # basta per un UUID (36)
+MAX_KEY = 24
+ANY = "*"  # qualsiasi indice di array nel percorso
+
+_WS = (0x20, 0x09, 0x0D, 0x0A)
+_END = (0x2C, 0x7D, 0x5D, 0x20, 0x09, 0x0D, 0x0A)
+_ESCAPES = {ord("n"): 10, ord("t"): 9, ord("r"): 13, ord("b"): 8, ord("f"): 12}
+
+
+def cut_str(out, limit=MAX_STR):
+    """Decodifica i primi limit byte senza spezzare un carattere UTF-8"""
+    if len(out) < limit:
+        return out.decode()
+    out = out[:limit]
+    end = len(out)
+    i = end
+    # risale fino al byte iniziale dell'ultimo carattere (max 4 byte)
+    while i > 0 and end - i < 4 and out[i - 1] & 0xC0 == 0x80:
+        i -= 1
+    if i == 0:
+        return ""
+    lead = out[i - 1]
+    need = 1 if lead < 0x80 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+    if end - (i - 1) < need:
+        out = out[:i - 1]
+    return out.decode()
+
+
+class _Stream:
+    def __init__(self, read, chunk):
+        self.read = read
+        self.chunk = chunk
+        self.buf = b""
+        self.i = 0
+
+    def peek(self):
+        if self.i >= len(self.buf):
+            self.buf = self.read(self.chunk)
+            self.i = 0
+            if not self.buf:
+                raise ValueError("JSON troncato")
+        return self.buf[self.i]
+
+    def next(self):
+        c = self.peek()
+        self.i += 1
+        return c
+
+    def skip_ws(self):
+        c = self.peek()
+        while c in _WS:
+            self.i += 1
+            c = self.peek()
+        return c
+
+    def expect(self, ch):
+        if self.skip_ws() != ch:
+            raise ValueError("JSON non valido")
+        self.i += 1
+
+
+class _Extractor:
+    def __init__(self, stream, paths, sink):
+        self.s = stream
+        self.paths = paths
+        self.sink = sink
+        self.path = []
+        self.found = {}
+
+    def _matches(self, wanted, full):
+        path = self.path
+        if len(wanted) < len(path) or (full and len(wanted) != len(path)):
+            return False
+        for i in range(len(path)):
+            w = wanted[i]
+            if w != path[i] and not (w == ANY and isinstance(path[i], int)):
+                return False
+        return True
+
+    def _wanted(self):
+        for wanted in self.paths:
+            if self._matches(wanted, True):
+                return wanted
+        return None
+
+    def _inside(self):
+        for wanted in self.paths:
+            if len(wanted) > len(self.path) and self._matches(wanted, False):
+                return True
+        return False
+
+    def _string(self, capture, limit):
+        s = self.s
+        s.next()  # "
+        out = bytearray() if capture else None
+        while True:
+            c = s.next()
+            if c == 0x22:  # "
+                break
+            if c == 0x5C:  # \
+                c = s.next()
+                if c == 0x75:  # u
+                    code = 0
+                    for _ in range(4):
+                        code = (code << 4) | int(chr(s.next()), 16)
+                    if capture and len(out) < limit:
+                        out.extend(chr(code).encode())
+                    continue
+                c = _ESCAPES.get(c, c)
+            if capture and len(out) < limit:
+                out.append(c)
+        if not capture:
+            return None
+        return cut_str(out, limit)
+
+    def _scalar(self, capture):
+        s = self.s
+        out = bytearray() if capture else None
+        c = s.peek()
+        while c not in _END:
+            if capture and len(out) < MAX_STR:
+                out.append(c)
+            s.i += 1
+            c = s.peek()
+        if not capture:
+            return None
+        text = out.decode()
+        if text == "true":
+            return True
+        if text == "false":
+            return False
+        if text == "null":
+            return None
+        return float(text) if ("." in text or "e" in text or "E" in text) else int(text)
+
+    def _emit(self, wanted, value):
+        name = self.paths[wanted]
+        if ANY in wanted:
+            # indice dell'elemento che corrisponde al primo ANY del percorso
+            index = self.path[wanted.index(ANY)]
+            if self.sink is not None:
+                self.sink(name, index, value)
+        else:
+            self.found[name] = value
+
+    def value(self):
+        s = self.s
+        c = s.skip_ws()
+        if c == 0x7B:  # {
+            descend = self._inside()
+            s.next()
+            if s.skip_ws() == 0x7D:
+                s.next()
+                return
+            while True:
+                s.skip_ws()
+                key = self._string(descend, MAX_KEY)
+                s.expect(0x3A)  # :
+                self.path.append(key)
+                self.value()
+                self.path.pop()
+                c = s.skip_ws()
+                s.next()
+                if c == 0x7D:
+                    return
+                if c != 0x2C:
+                    raise ValueError("JSON non valido")
+        elif c == 0x5B:  # [
+            s.next()
+            if s.skip_ws() == 0x5D:
+                s.next()
+                return
+            index = 0
+            while True:
+                self.path.append(index)
+                self.value()
+                self.path.pop()
+                index += 1
+                c = s.skip_ws()
+                s.next()
+                if c == 0x5D:
+                    return
+                if c != 0x2C:
+                    raise ValueError("JSON non valido")
+        else:
+            wanted = self._wanted()
+            if c == 0x22:
+                value = self._string(wanted is not None, MAX_STR)
+            else:
+                value = self._scalar(wanted is not None)
+            if wanted is not None:
+                self._emit(wanted, value)
+
+
+def extract(read, paths, sink=None, chunk=CHUNK):
+    """Estrae i campi scalari indicati da un body JSON letto con read(n).
+
+    paths: {percorso: nome}, dove un percorso e' una tupla di chiavi e
+    indici; ANY corrisponde a qualunque indice di array. I valori con ANY
+    vanno a sink(nome, indice, valore), gli altri nel dict restituito.
+    """
+    extractor = _Extractor(_Stream(read, chunk), paths, sink)
+    extractor.value()
+    return extractor.found
+
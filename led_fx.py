@@ -0,0 +1,111 @@
+# Effetti LED via PWM hardware con tabelle di luminosita' precalcolate
+
+from machine import Timer
+from micropython import const
+from array import array
+
+LED_FREQ = const(1000)
+LED_MAX = const(65535)
+TICK_MS = const(20)
+
+
+def gamma_ramp(steps, gamma=2.2, peak=LED_MAX):
+    """Rampa 0..peak corretta in gamma (array di duty_u16)"""
+    table = array("H", [0] * steps)
+    last = steps - 1
+    for i in range(steps):
+        table[i] = int(peak * (i / last) ** gamma)
+    return table
+
+
+def _reversed(table):
+    out = array("H", table)
+    n = len(out)
+    for i in range(n // 2):
+        out[i], out[n - 1 - i] = out[n - 1 - i], out[i]
+    return out
+
+
+# Tabelle condivise: calcolate una volta all'import, poi solo lookup
+FADE_IN = gamma_ramp(12)                # ~240 ms
+FADE_OUT = _reversed(FADE_IN)
+BREATH = gamma_ramp(40) + _reversed(gamma_ramp(40))  # ~1.6 s per respiro
+
+
+class LedAnimator:
+    """Avanza le tabelle di duty dei LED da un Timer periodico.
+
+    Ogni canale ha al massimo una tabella attiva: il callback fa solo
+    un lookup e un duty_u16() per canale, il loop di gioco non e' coinvolto.
+    """
+
+    def __init__(self, pwms, tick_ms=TICK_MS):
+        self.pwms = pwms
+        n = len(pwms)
+        self.tables = [None] * n
+        self.pos = bytearray(n)
+        self.loop = bytearray(n)
+        for pwm in pwms:
+            pwm.freq(LED_FREQ)
+            pwm.duty_u16(0)
+        self._tick_cb = self._tick  # evita di allocare il bound method nell'IRQ
+        self.timer = Timer(-1)
+        self.timer.init(mode=Timer.PERIODIC, period=tick_ms, callback=self._tick_cb)
+
+    def _tick(self, _timer):
+        tables = self.tables
+        for i in range(len(tables)):
+            table = tables[i]
+            if table is None:
+                continue
+            p = self.pos[i]
+            self.pwms[i].duty_u16(table[p])
+            p += 1
+            if p >= len(table):
+                if self.loop[i]:
+                    p = 0
+                else:
+                    tables[i] = None
+                    p = 0
+            self.pos[i] = p
+
+    def play(self, index, table, loop=False, offset=0):
+        """Avvia una tabella sul canale index (sostituisce quella attiva)"""
+        self.tables[index] = None
+        self.pos[index] = offset % len(table)
+        self.loop[index] = 1 if loop else 0
+        self.tables[index] = table
+
+    def set(self, index, duty):
+        """Duty fisso: ferma l'eventuale animazione del canale"""
+        self.tables[index] = None
+        self.pwms[index].duty_u16(duty)
+
+    def on(self, index):
+        self.set(index, LED_MAX)
+
+    def off(self, index):
+        self.set(index, 0)
+
+    def all(self, duty):
+        for i in range(len(self.pwms)):
+            self.set(i, duty)
+
+    def fade_in(self, index):
+        self.play(index, FADE_IN)
+
+    def fade_out(self, index):
+        self.play(index, FADE_OUT)
+
+    def breathe(self, index, offset=0):
+        self.play(index, BREATH, True, offset)
+
+    def chase(self, order, table=BREATH):
+        """Stessa tabella su tutti i canali, sfasata secondo order"""
+        step = len(table) // len(order)
+        for n, index in enumerate(order):
+            self.play(index, table, True, n * step)
+
+    def deinit(self):
+        self.timer.deinit()
+        self.all(0)
@@ -0,0 +1,374 @@
+# Client HTTP con budget di tempo per chiamata e circuit breaker per endpoint
+#
+# Socket non bloccanti + select.poll: ogni operazione (connect, handshake TLS,
+# invio, lettura) attende al massimo il tempo che resta del budget.
+# Nota: la risoluzione DNS resta bloccante, per questo l'indirizzo viene
+# messo in cache dopo la prima risoluzione; una chiamata fallita lo scarta,
+# cosi' un cambio di IP del backend si recupera senza riavvio.
+
+import socket
+import select
+import errno
+import time
+
+try:
+    import ssl
+except ImportError:
+    ssl = None
+
+_RETRY = (errno.EAGAIN, errno.EINPROGRESS, getattr(errno, "EWOULDBLOCK", errno.EAGAIN),
+          getattr(errno, "EALREADY", errno.EINPROGRESS))
+_WANT_READ = getattr(ssl, "SSLWantReadError", ())
+_WANT_WRITE = getattr(ssl, "SSLWantWriteError", ())
+_CHUNK = 128
+_MAX_LINE = 512
+
+
+class DeadlineExceeded(OSError):
+    pass
+
+
+class CircuitOpen(OSError):
+    pass
+
+
+class CircuitBreaker:
+    """Dopo `threshold` errori di fila salta le chiamate per `cooldown_ms`.
+
+    Passato il cooldown lascia passare una chiamata di prova: se fallisce
+    il breaker si riapre subito.
+    """
+
+    def __init__(self, threshold=3, cooldown_ms=60000):
+        self.threshold = threshold
+        self.cooldown_ms = cooldown_ms
+        self.failures = 0
+        self.opened_at = 0
+
+    def allow(self):
+        if self.failures < self.threshold:
+            return True
+        if time.ticks_diff(time.ticks_ms(), self.opened_at) >= self.cooldown_ms:
+            self.failures = self.threshold - 1  # prova singola (half-open)
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+
+    def failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.ticks_ms()
+
+
+class EndpointStats:
+    def __init__(self):
+        self.calls = 0
+        self.ok = 0
+        self.failed = 0
+        self.over_budget = 0
+        self.skipped = 0
+        self.total_ms = 0
+        self.max_ms = 0
+
+    def __str__(self):
+        done = self.ok + self.failed
+        avg = self.total_ms // done if done else 0
+        return (f"calls {self.calls} ok {self.ok} fail {self.failed} "
+                f"over {self.over_budget} skip {self.skipped} avg {avg}ms max {self.max_ms}ms")
+
+
+class Response:
+    """Risposta HTTP letta entro la scadenza della richiesta"""
+
+    def __init__(self, client, endpoint, sock, deadline, started, addr_key=None):
+        self._client = client
+        self._endpoint = endpoint
+        self._addr_key = addr_key
+        self._sock = sock
+        self._deadline = deadline
+        self._started = started
+        self._buf = b""
+        self._poller = select.poll()
+        self._poller.register(sock, select.POLLIN)
+        self._failed = False
+        self._timed_out = False
+        self.status_code = 0
+        self.content_length = -1
+        self.content_type = ""
+
+    def _wait(self, event):
+        remaining = time.ticks_diff(self._deadline, time.ticks_ms())
+        if remaining <= 0:
+            raise DeadlineExceeded(errno.ETIMEDOUT, "deadline exceeded")
+        self._poller.modify(self._sock, event)
+        if not self._poller.poll(remaining):
+            raise DeadlineExceeded(errno.ETIMEDOUT, "deadline exceeded")
+
+    def _io(self, fn, arg, event):
+        while True:
+            try:
+                result = fn(arg)
+            except _WANT_READ:
+                self._wait(select.POLLIN)
+                continue
+            except _WANT_WRITE:
+                self._wait(select.POLLOUT)
+                continue
+            except OSError as e:
+                if e.errno not in _RETRY:
+                    raise
+                result = None
+            if result is not None:
+                return result
+            self._wait(event)
+
+    def _send_all(self, data):
+        write = getattr(self._sock, "write", None) or self._sock.send
+        mv = memoryview(data)
+        while len(mv):
+            n = self._io(write, mv, select.POLLOUT)
+            mv = mv[n:]
+
+    def _recv(self, n):
+        if getattr(self._sock, "pending", None) and self._sock.pending():
+            return self._sock.read(n)
+        read = getattr(self._sock, "read", None) or self._sock.recv
+        return self._io(read, n, select.POLLIN)
+
+    def _readline(self):
+        while True:
+            end = self._buf.find(b"\r\n")
+            if end >= 0:
+                line = self._buf[:end]
+                self._buf = self._buf[end + 2:]
+                return line
+            if len(self._buf) > _MAX_LINE:
+                raise OSError(errno.EINVAL, "header line too long")
+            chunk = self._recv(_CHUNK)
+            if not chunk:
+                raise OSError(errno.ECONNRESET, "connection closed")
+            self._buf += chunk
+
+    def _read_head(self):
+        status = self._readline().split(None, 2)
+        self.status_code = int(status[1])
+        while True:
+            line = self._readline()
+            if not line:
+                break
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                self.content_length = int(value)
+            elif name == b"content-type":
+                self.content_type = value.strip().decode()
+        if self.content_length == 0:
+            self.content_length = -2
+
+    def read(self, n=_CHUNK):
+        """Al massimo n byte del body; b'' a fine risposta"""
+        try:
+            if self._buf:
+                data = self._buf[:n]
+                self._buf = self._buf[n:]
+            else:
+                data = self._recv(n)
+        except DeadlineExceeded:
+            self._failed = self._timed_out = True
+            raise
+        except OSError:
+            self._failed = True
+            raise
+        if self.content_length >= 0:
+            data = data[:self.content_length]
+            self.content_length -= len(data)
+            if not self.content_length:
+                self.content_length = -2  # body completo
+        return data
+
+    def readall(self):
+        parts = []
+        while self.content_length != -2:
+            data = self.read()
+            if not data:
+                break
+            parts.append(data)
+        return b"".join(parts)
+
+    @property
+    def text(self):
+        return self.readall().decode()
+
+    def json(self):
+        import json
+        try:
+            return json.loads(self.readall())
+        except ValueError:
+            self.fail()
+            raise
+
+    def fail(self):
+        """Body non valido: la chiamata conta come errore per il breaker"""
+        self._failed = True
+
+    def close(self):
+        """Chiude il socket e registra esito e durata della chiamata"""
+        if self._sock is None:
+            return
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        self._sock = None
+        ok = not self._failed and self.status_code < 500
+        if self._failed and self._addr_key:
+            self._client._forget(self._addr_key)
+        self._client._complete(self._endpoint, self._started, ok, self._timed_out,
+                               self.status_code)
+
+
+class Client:
+    """Richieste HTTP/1.0 con budget in ms e un circuit breaker per endpoint"""
+
+    def __init__(self, budget_ms=3000, threshold=3, cooldown_ms=60000):
+        self.budget_ms = budget_ms
+        self.threshold = threshold
+        self.cooldown_ms = cooldown_ms
+        self.breakers = {}
+        self.stats = {}
+        self._addr_cache = {}
+        self._ssl_ctx = None
+        # hook opzionale (endpoint, ms, esito) usato dagli strumenti di test;
+        # esito: ok, http_error (risposta non 200), error, timeout, skipped
+        self.on_complete = None
+
+    def _endpoint(self, endpoint):
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers[endpoint] = CircuitBreaker(self.threshold, self.cooldown_ms)
+            self.stats[endpoint] = EndpointStats()
+        return breaker, self.stats[endpoint]
+
+    def _complete(self, endpoint, started, ok, timed_out, status=0):
+        breaker, stats = self._endpoint(endpoint)
+        elapsed = time.ticks_diff(time.ticks_ms(), started)
+        stats.total_ms += elapsed
+        if elapsed > stats.max_ms:
+            stats.max_ms = elapsed
+        if ok:
+            stats.ok += 1
+            breaker.success()
+        else:
+            stats.failed += 1
+            breaker.failure()
+        if timed_out:
+            stats.over_budget += 1
+        if self.on_complete:
+            # i 4xx non aprono il breaker ma per gli strumenti restano errori
+            if ok:
+                outcome = "ok" if status == 200 else "http_error"
+            else:
+                outcome = "timeout" if timed_out else "error"
+            self.on_complete(endpoint, elapsed, outcome)
+
+    def available(self, endpoint):
+        return self._endpoint(endpoint)[0].allow()
+
+    def _resolve(self, host, port):
+        key = (host, port)
+        addr = self._addr_cache.get(key)
+        if addr is None:
+            addr = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)[0][-1]
+            self._addr_cache[key] = addr
+        return addr
+
+    def _forget(self, key):
+        self._addr_cache.pop(key, None)
+
+    def _wrap_tls(self, sock, host):
+        if self._ssl_ctx is None:
+            if hasattr(ssl, "create_default_context"):
+                self._ssl_ctx = ssl.create_default_context()
+            else:
+                # MicroPython: nessuna verifica del certificato, come urequests
+                self._ssl_ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+                self._ssl_ctx.verify_mode = ssl.CERT_NONE
+        return self._ssl_ctx.wrap_socket(sock, server_hostname=host,
+                                         do_handshake_on_connect=False)
+
+    def request(self, endpoint, method, url, headers=None, data=None, budget_ms=None):
+        """Invia la richiesta e legge status e header entro il budget.
+
+        Solleva CircuitOpen se l'endpoint e' in cooldown, DeadlineExceeded
+        se il budget finisce; il body si legge poi dalla Response, sempre
+        entro la stessa scadenza.
+        """
+        breaker, stats = self._endpoint(endpoint)
+        stats.calls += 1
+        if not breaker.allow():
+            stats.skipped += 1
+            if self.on_complete:
+                self.on_complete(endpoint, 0, "skipped")
+            raise CircuitOpen(errno.ECONNREFUSED, "circuit open: " + endpoint)
+
+        started = time.ticks_ms()
+        deadline = time.ticks_add(started, budget_ms or self.budget_ms)
+        proto, _, rest = url.partition("://")
+        host, _, path = rest.partition("/")
+        host, _, port = host.partition(":")
+        tls = proto == "https"
+        port = int(port) if port else (443 if tls else 80)
+
+        sock = None
+        response = None
+        try:
+            addr = self._resolve(host, port)
+            sock = socket.socket()
+            sock.setblocking(False)
+            try:
+                sock.connect(addr)
+            except OSError as e:
+                if e.errno not in _RETRY:
+                    raise
+            if tls:
+                # il wrap TLS richiede la connessione TCP gia' stabilita
+                poller = select.poll()
+                poller.register(sock, select.POLLOUT)
+                remaining = time.ticks_diff(deadline, time.ticks_ms())
+                if remaining <= 0 or not poller.poll(remaining):
+                    raise DeadlineExceeded(errno.ETIMEDOUT, "deadline exceeded")
+                poller.unregister(sock)
+                sock = self._wrap_tls(sock, host)
+            response = Response(self, endpoint, sock, deadline, started, (host, port))
+            if tls and hasattr(sock, "do_handshake"):
+                response._io(lambda _: sock.do_handshake() or True, None, select.POLLIN)
+
+            if isinstance(data, str):
+                data = data.encode()
+            head = [f"{method} /{path} HTTP/1.0\r\nHost: {host}\r\n"]
+            for name, value in (headers or {}).items():
+                head.append(f"{name}: {value}\r\n")
+            head.append(f"Content-Length: {len(data) if data else 0}\r\n\r\n")
+            response._send_all("".join(head).encode())
+            if data:
+                response._send_all(data)
+            response._read_head()
+            return response
+        except Exception as e:
+            if response is not None and response._sock is sock:
+                response._failed = True
+                response._timed_out = isinstance(e, DeadlineExceeded)
+                response.close()
+            else:
+                if sock is not None:
+                    sock.close()
+                self._forget((host, port))
+                self._complete(endpoint, started, False, isinstance(e, DeadlineExceeded))
+            raise
+
+    def report(self):
+        # copia: le richieste in background possono aggiungere endpoint
+        for endpoint, stats in list(self.stats.items()):
+            print(f"{endpoint}: {stats}")
@@ -2,6 +2,7 @@
 
 from micropython import const
 import framebuf
+import time
 
 
 # register definitions
@@ -22,6 +23,24 @@ SET_DISP_CLK_DIV = const(0xD5)
 SET_PRECHARGE = const(0xD9)
 SET_VCOM_DESEL = const(0xDB)
 SET_CHARGE_PUMP = const(0x8D)
+SET_HSCROLL_RIGHT = const(0x26)
+SET_HSCROLL_LEFT = const(0x27)
+SET_VHSCROLL_RIGHT = const(0x29)
+SET_VHSCROLL_LEFT = const(0x2A)
+SET_SCROLL_OFF = const(0x2E)
+SET_SCROLL_ON = const(0x2F)
+SET_VSCROLL_AREA = const(0xA3)
+SET_NOP = const(0xE3)
+
+# scroll step interval codes, in frames: 5, 64, 128, 256, 3, 4, 25, 2
+SCROLL_FRAMES_2 = const(0x07)
+SCROLL_FRAMES_5 = const(0x00)
+SCROLL_FRAMES_25 = const(0x06)
+SCROLL_FRAMES_64 = const(0x01)
+
+# I2C bus speeds tried at startup, fastest first (Fast-mode Plus .. Standard)
+FREQ_LADDER = (1000000, 800000, 400000, 100000)
+PROBE_ROUNDS = 4
 
 # Subclassing FrameBuffer provides support for graphics primitives
 # http://docs.micropython.org/en/latest/pyboard/library/framebuf.html
@@ -32,11 +51,16 @@ class SSD1306(framebuf.FrameBuffer):
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        self.scrolling = False
+        self.contrast_level = 0xFF
+        self.inverted = 0
+        self.line = 0
+        self.powered = 1
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         self.init_display()
 
-    def init_display(self):
-        for cmd in (
+    def init_cmds(self):
+        return (
             SET_DISP | 0x00,  # off
             # address setting
             SET_MEM_ADDR,
@@ -60,64 +84,261 @@ class SSD1306(framebuf.FrameBuffer):
             0x30,  # 0.83*Vcc
             # display
             SET_CONTRAST,
-            0xFF,  # maximum
+            self.contrast_level,
             SET_ENTIRE_ON,  # output follows RAM contents
-            SET_NORM_INV,  # not inverted
+            SET_NORM_INV | self.inverted,
+            SET_DISP_START_LINE | self.line,
             # charge pump
             SET_CHARGE_PUMP,
             0x10 if self.external_vcc else 0x14,
-            SET_DISP | 0x01,
-        ):  # on
-            self.write_cmd(cmd)
+            SET_DISP | self.powered,
+        )
+
+    def init_display(self):
+        self.write_cmds(self.init_cmds())
         self.fill(0)
         self.show()
 
+    def write_cmds(self, cmds):
+        # multi-byte command; the I2C driver sends it as one transfer
+        for cmd in cmds:
+            self.write_cmd(cmd)
+
     def poweroff(self):
+        self.powered = 0
         self.write_cmd(SET_DISP | 0x00)
 
     def poweron(self):
+        self.powered = 1
         self.write_cmd(SET_DISP | 0x01)
 
     def contrast(self, contrast):
-        self.write_cmd(SET_CONTRAST)
-        self.write_cmd(contrast)
+        self.write_cmds((SET_CONTRAST, contrast))
+        self.contrast_level = contrast
+
+    def fade_step(self, target, step=16):
+        # move contrast one step towards target; False once it is reached
+        level = self.contrast_level
+        if level == target:
+            return False
+        if level < target:
+            level = min(level + step, target)
+        else:
+            level = max(level - step, target)
+        self.contrast(level)
+        return True
 
     def invert(self, invert):
-        self.write_cmd(SET_NORM_INV | (invert & 1))
+        self.inverted = invert & 1
+        self.write_cmd(SET_NORM_INV | self.inverted)
+
+    def start_line(self, line):
+        # hardware vertical roll of the whole panel, no RAM transfer
+        self.line = line % self.height
+        self.write_cmd(SET_DISP_START_LINE | self.line)
+
+    def scroll_h(self, right=True, start_page=0, end_page=None, interval=SCROLL_FRAMES_5):
+        # continuous horizontal scroll of pages start_page..end_page
+        if end_page is None:
+            end_page = self.pages - 1
+        self.scroll_stop()
+        self.write_cmds((
+            SET_HSCROLL_RIGHT if right else SET_HSCROLL_LEFT,
+            0x00,
+            start_page,
+            interval,
+            end_page,
+            0x00,
+            0xFF,
+            SET_SCROLL_ON,
+        ))
+        self.scrolling = True
+
+    def scroll_diag(self, right=True, start_page=0, end_page=None, interval=SCROLL_FRAMES_5,
+                    offset=1, fixed_rows=0, scroll_rows=None):
+        # horizontal scroll of the pages plus a vertical offset of `offset`
+        # rows per step inside the area below `fixed_rows`
+        if end_page is None:
+            end_page = self.pages - 1
+        if scroll_rows is None:
+            scroll_rows = self.height - fixed_rows
+        self.scroll_stop()
+        self.write_cmds((
+            SET_VSCROLL_AREA,
+            fixed_rows,
+            scroll_rows,
+            SET_VHSCROLL_RIGHT if right else SET_VHSCROLL_LEFT,
+            0x00,
+            start_page,
+            interval,
+            end_page,
+            offset,
+            SET_SCROLL_ON,
+        ))
+        self.scrolling = True
+
+    def scroll_stop(self):
+        if self.scrolling:
+            self.write_cmd(SET_SCROLL_OFF)
+            self.scrolling = False
 
     def show(self):
+        # GDDRAM must not be written while scrolling is active
+        self.scroll_stop()
         x0 = 0
         x1 = self.width - 1
         if self.width == 64:
             # displays with width of 64 pixels are shifted by 32
             x0 += 32
             x1 += 32
-        self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
+        self.write_cmds((SET_COL_ADDR, x0, x1, SET_PAGE_ADDR, 0, self.pages - 1))
         self.write_data(self.buffer)
 
+    def show_area(self, x0, x1, page0, page1):
+        # send only columns x0..x1 of pages page0..page1
+        self.scroll_stop()
+        x1 = min(x1, self.width - 1)
+        page1 = min(page1, self.pages - 1)
+        offset = 32 if self.width == 64 else 0
+        self.write_cmds((SET_COL_ADDR, x0 + offset, x1 + offset, SET_PAGE_ADDR, page0, page1))
+        mv = memoryview(self.buffer)
+        for page in range(page0, page1 + 1):
+            start = page * self.width
+            self.write_data(mv[start + x0:start + x1 + 1])
+
 
 class SSD1306_I2C(SSD1306):
-    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False):
+    # With bus_factory (freq -> I2C) the driver picks the fastest speed in
+    # freqs that survives PROBE_ROUNDS test transfers. If a transfer fails
+    # later on it steps down the ladder, restores the controller state and
+    # the whole frame, then resends the failed command.
+    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False,
+                 bus_factory=None, freqs=FREQ_LADDER):
         self.i2c = i2c
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b"\x40", None]  # Co=0, D/C#=1
+        self.bus_factory = bus_factory
+        self.freqs = freqs
+        self.freq = None
+        self.freq_index = -1
+        self.recovering = False
+        self.step_downs = 0
+        self.flushes = 0
+        self.flush_total_us = 0
+        self.flush_max_us = 0
+        self.flush_last_us = 0
+        if bus_factory is not None:
+            self.probe(width, 0, True)
         super().__init__(width, height, external_vcc)
 
+    def probe(self, width, start=0, data=False):
+        # fastest frequency from freqs[start:] where test transfers get ACKed;
+        # data=True also writes a blank page (only before init, GDDRAM is
+        # cleared anyway), otherwise only NOP commands are sent
+        page = bytearray(width) if data else None
+        for i in range(start, len(self.freqs)):
+            freq = self.freqs[i]
+            try:
+                self.i2c = self.bus_factory(freq)
+                for _ in range(PROBE_ROUNDS):
+                    self._send_cmds((SET_NOP,))
+                    if page is not None:
+                        self._send_cmds((SET_COL_ADDR, 0, width - 1, SET_PAGE_ADDR, 0, 0))
+                        self.write_list[1] = page
+                        acks = self.i2c.writevto(self.addr, self.write_list)
+                        if acks is not None and acks < width + 1:
+                            raise OSError("NACK")
+            except OSError:
+                continue
+            self.freq = freq
+            self.freq_index = i
+            return freq
+        raise OSError("SSD1306 not responding at any I2C speed")
+
+    def _send_cmds(self, cmds):
+        # Co=0, D/C#=0: every following byte is a command byte
+        buf = bytearray(len(cmds) + 1)
+        buf[1:] = bytes(cmds)
+        acks = self.i2c.writeto(self.addr, buf)
+        if acks is not None and acks < len(buf):
+            raise OSError("NACK")
+
+    def _recover(self):
+        # step down until the controller state and the frame are restored
+        if self.bus_factory is None or self.recovering:
+            return False
+        self.recovering = True
+        try:
+            while self.freq_index + 1 < len(self.freqs):
+                try:
+                    self.probe(self.width, self.freq_index + 1)
+                except OSError:
+                    return False
+                self.step_downs += 1
+                try:
+                    # a half-sent command may have swallowed bytes: resend all
+                    self._send_cmds(self.init_cmds())
+                    self.scrolling = True  # unknown after the error
+                    SSD1306.show(self)
+                    return True
+                except OSError:
+                    continue
+            return False
+        finally:
+            self.recovering = False
+
     def write_cmd(self, cmd):
         self.temp[0] = 0x80  # Co=1, D/C#=0
         self.temp[1] = cmd
-        self.i2c.writeto(self.addr, self.temp)
+        try:
+            self.i2c.writeto(self.addr, self.temp)
+        except OSError:
+            if not self._recover():
+                raise
+            self.i2c.writeto(self.addr, self.temp)
+
+    def write_cmds(self, cmds):
+        try:
+            self._send_cmds(cmds)
+        except OSError:
+            if not self._recover():
+                raise
+            self._send_cmds(cmds)
 
     def write_data(self, buf):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
 
+    def show(self):
+        # full-frame flush, timed; after a recovery the frame is already sent
+        t0 = time.ticks_us()
+        try:
+            super().show()
+        except OSError:
+            if not self._recover():
+                raise
+        elapsed = time.ticks_diff(time.ticks_us(), t0)
+        self.flushes += 1
+        self.flush_total_us += elapsed
+        self.flush_last_us = elapsed
+        if elapsed > self.flush_max_us:
+            self.flush_max_us = elapsed
+
+    def show_area(self, x0, x1, page0, page1):
+        try:
+            super().show_area(x0, x1, page0, page1)
+        except OSError:
+            if not self._recover():
+                raise
+
+    def report(self):
+        freq = f"{self.freq // 1000} kHz" if self.freq else "fixed"
+        avg = self.flush_total_us // self.flushes if self.flushes else 0
+        print(f"ssd1306: I2C {freq}, show() avg {avg}us max {self.flush_max_us}us "
+              f"last {self.flush_last_us}us ({self.flushes} flushes, "
+              f"{self.step_downs} step-downs)")
+
 
 class SSD1306_SPI(SSD1306):
     def __init__(self, width, height, spi, dc, res, cs, external_vcc=False):
@@ -2,8 +2,15 @@ from machine import Pin, I2C, PWM
 import time
 import urandom
 import json
-import gc
-import urequests
+from array import array
+import led_fx
+import net
+import input_trace
+import ui
+import gc_policy
+import jsonstream
+import debounce
+import wire
 from lovable import SUPABASE_URL, SUPABASE_ANON_KEY
 
 class TIG00:
@@ -16,7 +23,7 @@ class TIG00:
     PIN_LED_BLUE = 11
     PIN_LED_YELLOW = 10
     PIN_LED_GREEN = 2
-    PIN_LED_RED = 3
+    PIN_LED_RED = 3  # LED su slice PWM 1 e 5, il buzzer sta sulla slice 4
     PIN_BUZZER = 9
     PIN_SDA = 0
     PIN_SCL = 1
@@ -25,8 +32,15 @@ class TIG00:
     I2C_DISPLAY_ADDR = 0x3C
 
     # Constants
-    NO_BUTTON = 255
-    MAX_SEQUENCE_LENGTH = 25
+    LEADERBOARD_SIZE = 10
+    LEADERBOARD_PAGE_ROWS = 3
+    LEADERBOARD_PAGE_MS = 3000
+
+    # Budget delle chiamate di rete (ms): end-game e submit-name bloccano il gioco
+    NET_BUDGET_START_GAME = 4000
+    NET_BUDGET_END_GAME = 2500
+    NET_BUDGET_SUBMIT_NAME = 2500
+    NET_BUDGET_LEADERBOARD = 4000
     
     # Game states
     class GameStates:
@@ -38,17 +52,114 @@ class TIG00:
         INSERT_NAME = 8
 
     class Button:
-        """Rappresenta un pulsante con il suo pin, tono e LED associato"""
+        """Rappresenta un pulsante con il suo pin, tono e LED associato (PWM)"""
         def __init__(self, pin, tone, led_pin):
             self.pin = Pin(pin, Pin.IN, Pin.PULL_UP)
             self.tone = tone
-            self.led = Pin(led_pin, Pin.OUT)
-            self.is_ready = True
-            self.is_pressed = False
+            self.led = PWM(Pin(led_pin))
+
+    class Sequence:
+        """Sequenza di gioco a 2 bit per passo, senza limite di lunghezza.
+
+        I passi sono impacchettati 4 per byte in un bytearray che raddoppia
+        quando si riempie; la lunghezza e' esplicita (niente sentinella).
+        """
+        def __init__(self, capacity=32):
+            self.data = bytearray((capacity + 3) >> 2)
+            self.length = 0
+
+        def clear(self):
+            self.length = 0
+
+        def append(self, value):
+            n = self.length
+            if (n >> 2) >= len(self.data):
+                grown = bytearray(len(self.data) * 2)
+                grown[:len(self.data)] = self.data
+                self.data = grown
+            shift = (n & 3) << 1
+            i = n >> 2
+            self.data[i] = (self.data[i] & ~(3 << shift) & 0xFF) | ((value & 3) << shift)
+            self.length = n + 1
+
+        def __len__(self):
+            return self.length
+
+        def __getitem__(self, index):
+            return (self.data[index >> 2] >> ((index & 3) << 1)) & 3
+
+    class Leaderboard:
+        """Top-N in tabella fissa, con le righe del display gia' formattate"""
+        def __init__(self, size):
+            self.size = size
+            self.scores = array('H', [0] * size)
+            self.rows = [""] * size
+            # download in corso: la tabella visibile cambia solo a commit()
+            self.next_scores = array('H', [0] * size)
+            self.next_rows = [""] * size
+            self.count = 0
+            self.page = 0
+            self.changed = False
+            self.loaded = False  # True dopo il primo download riuscito della top-N
+
+        def begin(self):
+            """Azzera la tabella di appoggio prima di un nuovo download"""
+            for i in range(self.size):
+                self.next_rows[i] = "---"
+                self.next_scores[i] = 0
+
+        def set_row_field(self, field, i, value):
+            """Sink per jsonstream: riceve nome e punteggio riga per riga"""
+            if i >= self.size:
+                return
+            if field == "name":
+                self.next_rows[i] = value if isinstance(value, str) and value else "---"
+            else:
+                # array('H'): niente float, negativi o valori oltre 65535
+                score = int(value) if isinstance(value, (int, float)) else 0
+                self.next_scores[i] = min(max(score, 0), 0xFFFF)
+
+        def commit(self, count):
+            """Formatta le prime count righe ricevute e le rende visibili"""
+            count = min(count, self.size)
+            for i in range(count):
+                self.next_rows[i] = f"{i + 1:>2} {self.next_rows[i][:8]:<8} {self.next_scores[i]:>3}"
+            self.rows, self.next_rows = self.next_rows, self.rows
+            self.scores, self.next_scores = self.next_scores, self.scores
+            self.count = count
+            self.page = 0
+            self.changed = True
+            self.loaded = True
+
+        def rank(self, score):
+            """Posizione di un punteggio appena fatto (0 se fuori dalla top-N o senza top-N)"""
+            if not self.loaded:
+                return 0
+            # a parita' di punteggio il server mette prima chi l'ha fatto prima
+            lo, hi = 0, self.count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.scores[mid] >= score:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo >= self.size:
+                return 0
+            return lo + 1
+
+        def pages(self, rows_per_page):
+            return max(1, (self.count + rows_per_page - 1) // rows_per_page)
+
+        def page_rows(self, rows_per_page):
+            start = self.page * rows_per_page
+            return self.rows[start:min(start + rows_per_page, self.count)]
+
+        def next_page(self, rows_per_page):
+            self.page = (self.page + 1) % self.pages(rows_per_page)
 
     def __init__(self):
-        # Inizializza I2C
-        self.i2c = I2C(0, scl=Pin(self.PIN_SCL), sda=Pin(self.PIN_SDA), freq=400000)
+        # Inizializza I2C (400 kHz per la scansione; il display sceglie poi la velocita')
+        self.i2c = self.i2c_bus(400000)
 
         # Definizione dei pulsanti con LED diretti
         # Toni: 300, 600, 900, 1200
@@ -59,6 +170,9 @@ class TIG00:
             self.Button(self.PIN_BUTTON_RED, 1200, self.PIN_LED_RED)        # Red
         ]
 
+        # Animazioni LED (fade, respiro, chase) avanzate da Timer
+        self.leds = led_fx.LedAnimator([button.led for button in self.buttons])
+
         # Nomi dei colori per il display
         self.color_names = ["Blue", "Yellow", "Green", "Red"]
 
@@ -75,7 +189,7 @@ class TIG00:
 
         # Variabili di gioco
         self.level = 1
-        self.game_sequence = [self.NO_BUTTON] * self.MAX_SEQUENCE_LENGTH
+        self.game_sequence = self.Sequence()
         self.game_state = self.GameStates.LOBBY
         self.animation_sequence = [2, 3, 1, 0]  # Green, Red, Yellow, Blue
         self.animation_sequence_index = -1  # Start at -1 so first increment gives 0
@@ -84,12 +198,22 @@ class TIG00:
         self.player_playing_index = 0
         self.need_wait = False
         self.sequence_ended = False
+        self.rng_state = 1
+        self.buttons_mask = 0
+        self.pressed_mask = 0
+        self.released_mask = 0
+        # Pulsanti: lettura unica del registro GPIO e debouncing a 4 campioni
+        self.button_snapshot = debounce.GpioSnapshot(
+            [button.pin for button in self.buttons],
+            (self.PIN_BUTTON_BLUE, self.PIN_BUTTON_YELLOW, self.PIN_BUTTON_GREEN, self.PIN_BUTTON_RED))
+        self.debouncer = debounce.VerticalCounter(len(self.buttons))
 
         # Timer
         self.timer_playing = 0
         self.timer_pause = 0
         self.timer_player_waiting = 0
         self.timer_sequence_end = 0
+        self.timer_board_page = 0
 
         # Record e settings
         self.record = 0
@@ -103,6 +227,33 @@ class TIG00:
         self.is_top_record = False
         self.online = False  # Will be set by caller
 
+        # Rete: budget per chiamata e circuit breaker per endpoint
+        self.net = net.Client()
+        # formato per endpoint: True binario (wire), False solo JSON, assente = da scoprire
+        self.wire_formats = {}
+
+        # Traccia di input/stati in flash (attivata da start)
+        self.trace = None
+
+        # GC solo nelle pause del gioco (lobby, tra i livelli, game over)
+        self.gc = gc_policy.GcPolicy()
+
+        # Schermate a widget: si ridisegna solo cio' che cambia
+        self.shown_color = ""
+        self.screen = None
+        self.screens = {}
+        self._init_ui()
+
+        # Classifica top-N in cache (una sola richiesta per refresh)
+        self.leaderboard = self.Leaderboard(self.LEADERBOARD_SIZE)
+        self.last_rank = 0
+        # il backend non ha get-leaderboard: si usa direttamente get-top-score
+        self.leaderboard_missing = False
+
+    def i2c_bus(self, freq):
+        """Bus I2C del display alla frequenza richiesta (usato dal probe di ssd1306)"""
+        return I2C(0, scl=Pin(self.PIN_SCL), sda=Pin(self.PIN_SDA), freq=freq)
+
     def _init_display(self):
         """Inizializza il display SSD1306"""
         try:
@@ -112,9 +263,11 @@ class TIG00:
                 # Importa libreria ssd1306 se disponibile
                 try:
                     import ssd1306
-                    self.display = ssd1306.SSD1306_I2C(128, 64, self.i2c)
+                    self.display = ssd1306.SSD1306_I2C(128, 64, self.i2c,
+                                                       bus_factory=self.i2c_bus)
+                    self.i2c = self.display.i2c
                     self.display.poweron()
-                    print("Display SSD1306 initialized")
+                    print(f"Display SSD1306 initialized ({self.display.freq // 1000} kHz)")
                 except ImportError:
                     print("Warning: ssd1306 library not found")
                     self.display = None
@@ -125,13 +278,66 @@ class TIG00:
             self.display = None
 
 
-    def display_text(self, lines):
-        """Mostra testo sul display (array di stringhe)"""
-        if self.display:
-            self.display.fill(0)
-            for i, line in enumerate(lines):
-                self.display.text(line, 0, i * 10, 1)
-            self.display.show()
+    def _init_ui(self):
+        """Crea le schermate, con i widget legati allo stato di gioco"""
+        if not self.display:
+            return
+        d = self.display
+        self.lobby_title = ui.Label(0, ui.row(0), "TIG-00")
+        self.screens["lobby"] = ui.Screen(d, [
+            self.lobby_title,
+            ui.Label(0, ui.row(1), "Press a button"),
+            ui.Label(0, ui.row(3), lambda: self.lobby_line(0)),
+            ui.Label(0, ui.row(4), lambda: self.lobby_line(1)),
+            ui.Label(0, ui.row(5), lambda: self.lobby_line(2))
+        ])
+        self.screens["play"] = ui.Screen(d, [
+            ui.Counter(0, ui.row(0), "Level  ", lambda: self.level),
+            ui.Label(0, ui.row(2), lambda: f"Record {self.record}" if self.online else "OFFLINE MODE"),
+            ui.Label(0, ui.row(3), lambda: f"By {self.record_name}" if self.online else ""),
+            ui.Label(0, ui.row(5), lambda: self.shown_color)
+        ])
+        self.screens["game_over"] = ui.Screen(d, [
+            ui.Label(0, ui.row(0), "GAME OVER !"),
+            ui.Counter(0, ui.row(2), "Score ", lambda: self.level),
+            ui.Label(0, ui.row(3), lambda: f"Rank  #{self.last_rank}" if self.last_rank else "")
+        ])
+        self.screens["record"] = ui.Screen(d, [
+            ui.Label(0, ui.row(2), "!! NEW RECORD !!"),
+            ui.Counter(0, ui.row(4), "Level  ", lambda: self.level)
+        ])
+        self.screens["insert_name"] = ui.Screen(d, [
+            ui.Label(0, ui.row(0), "INSERT NAME"),
+            ui.Label(0, ui.row(1), lambda: self.record_name),
+            ui.Selector(0, ui.row(2), "ABCDEFGHIJKLMNOPQRSTUVWXYZ*", lambda: self.name_letter),
+            ui.Label(0, ui.row(3), "R:< Y:> B:OK"),
+            ui.Label(0, ui.row(4), "G:DEL *:END")
+        ])
+
+    def show_screen(self, name):
+        """Passa alla schermata (ridisegno completo) o la aggiorna se e' gia' attiva"""
+        if not self.display:
+            return
+        screen = self.screens[name]
+        if screen is self.screen:
+            screen.update()
+        else:
+            self.screen = screen
+            screen.show()
+
+    def refresh_screen(self):
+        """Ridisegna solo i widget cambiati della schermata attiva"""
+        if self.display and self.screen:
+            return self.screen.update()
+        return 0
+
+    def lobby_line(self, n):
+        if self.leaderboard.count:
+            rows = self.leaderboard.page_rows(self.LEADERBOARD_PAGE_ROWS)
+            return rows[n] if n < len(rows) else ""
+        if self.online:
+            return (f"Record {self.record}", f"By {self.record_name}", "")[n]
+        return ("OFFLINE MODE", "", "")[n]
 
     def display_clear(self):
         """Pulisce il display"""
@@ -146,11 +352,11 @@ class TIG00:
             self.buzzer.duty_u16(32768)  # 50% duty cycle
             self.buzzer_active = True
             if duration_ms:
-                time.sleep_ms(duration_ms)
+                self.sleep_ms(duration_ms)
                 self.no_tone()
         else:
             if duration_ms:
-                time.sleep_ms(duration_ms)
+                self.sleep_ms(duration_ms)
 
     def no_tone(self):
         """Ferma il tono del buzzer"""
@@ -162,30 +368,13 @@ class TIG00:
         """Accende un LED specifico"""
         #try:
         button = self.buttons[led_index]
-        button.led.on()
+        self.leds.on(led_index)
 
         # Mostra il colore sul display SOLO durante la presentazione della sequenza
-        if self.display and self.game_state == self.GameStates.SEQUENCE_PRESENTING:
-            color_name = self.color_names[led_index]
+        if self.game_state == self.GameStates.SEQUENCE_PRESENTING:
             # Centra il nome del colore (circa 16 caratteri per riga)
-            centered_color = color_name.center(16)
-            if self.online:
-                self.display_text([
-                    f"Level  {self.level}",
-                    "",
-                    f"Record {self.record}",
-                    f"By {self.record_name}",
-                    "",
-                    centered_color
-                ])
-            else:
-                self.display_text([
-                    f"Level  {self.level}",
-                    "",
-                    "OFFLINE MODE",
-                    "",
-                    centered_color
-                ])
+            self.shown_color = self.color_names[led_index].center(16)
+            self.refresh_screen()
 
         if execute_sound:
             self.tone(button.tone)
@@ -195,41 +384,60 @@ class TIG00:
 
     def all_leds_on(self):
         """Accende tutti i LED"""
-        for button in self.buttons:
-            button.led.on()
+        self.leds.all(led_fx.LED_MAX)
 
     def stop_leds(self):
         """Spegne tutti i LED"""
-        for button in self.buttons:
-            button.led.off()
+        self.leds.all(0)
         self.no_tone()
 
+    def sample_buttons(self):
+        """Maschera grezza dei pulsanti premuti (bit i = self.buttons[i])"""
+        return self.button_snapshot.read()
+
     def read_buttons(self):
-        """Legge lo stato dei pulsanti con debouncing (PULL_UP: 0=premuto, 1=rilasciato)"""
-        for button in self.buttons:
-            if button.pin.value() == 0:  # Pulsante premuto (PULL_UP)
-                if button.is_ready:
-                    button.is_ready = False
-                    button.is_pressed = True
-                else:
-                    button.is_pressed = False
-            else:  # Pulsante rilasciato
-                button.is_ready = True
-                button.is_pressed = False
+        """Campiona i pulsanti e calcola i fronti di pressione/rilascio filtrati"""
+        mask = self.sample_buttons()
+        if mask != self.buttons_mask:
+            self.buttons_mask = mask
+            if self.trace:
+                self.trace.buttons(mask)
+        self.pressed_mask, self.released_mask = self.debouncer.update(mask)
 
     def is_button_pressed(self, index):
-        return self.buttons[index].is_pressed
+        """True solo nel giro di loop in cui il pulsante risulta premuto"""
+        return (self.pressed_mask >> index) & 1 == 1
 
     def reset_button_states(self):
-        for button in self.buttons:
-            button.is_ready = True
-            button.is_pressed = False
+        self.pressed_mask = 0
+        self.released_mask = 0
 
     def any_button_pressed(self):
-        return any(btn.is_pressed for btn in self.buttons)
+        return self.pressed_mask != 0
+
+    def draw_seed(self):
+        return urandom.randint(1, 0xFFFF)
+
+    def seed_sequence(self, seed):
+        """Seed della sequenza della partita (registrato nella traccia)"""
+        self.rng_state = seed or 1
+        if self.trace:
+            self.trace.seed(seed)
 
     def random_button(self):
-        return urandom.randint(0, 3)
+        # xorshift16: sequenza riproducibile dal seed, solo interi piccoli
+        x = self.rng_state
+        x ^= (x << 7) & 0xFFFF
+        x ^= x >> 9
+        x ^= (x << 8) & 0xFFFF
+        self.rng_state = x
+        return x & 3
+
+    def millis(self):
+        return time.ticks_ms()
+
+    def sleep_ms(self, ms):
+        time.sleep_ms(ms)
 
     def penalty(self, base):
         difficulty = -1.0 / (self.level * self.level) + 0.5
@@ -237,9 +445,6 @@ class TIG00:
             return int(difficulty * base)
         return 0
 
-    def millis(self):
-        return time.ticks_ms()
-
     def playing_passed(self):
         return time.ticks_diff(self.millis(), self.timer_playing) >= (500 - self.penalty(400))
 
@@ -265,68 +470,105 @@ class TIG00:
         return time.ticks_diff(self.millis(), self.timer_sequence_end) >= 1000
 
     def rotate_animation(self):
-        self.stop_leds()
+        """Accende subito il LED successivo della sequenza (note della melodia)"""
         self.animation_sequence_index = (self.animation_sequence_index + 1) % len(self.animation_sequence)
         self.animation_button = self.animation_sequence[self.animation_sequence_index]
-        self.led_on(self.animation_button, False)
+        self.leds.on(self.animation_button)
+
+    def lobby_animation(self):
+        """Respiro sfasato sui quattro LED, avanzato dal Timer di LedAnimator"""
+        self.leds.chase(self.animation_sequence)
 
-    def end_game_melody(self):
+    def fade_out_leds(self):
+        for i in range(len(self.buttons)):
+            self.leds.fade_out(i)
+
+    def end_game_melody(self, flash=False):
         melody = [250, 196, 196, 220, 196, 0, 247, 250]
         note_durations = [4, 8, 8, 4, 4, 4, 4, 4]
 
         for i, note in enumerate(melody):
             duration = 1000 // note_durations[i]
+            if flash and self.display:
+                # Lampeggio e dissolvenza fatti dal controller: 3-4 byte per nota
+                self.display.invert(i & 1)
+                self.display.fade_step(0x20, 32)
             if note > 0:
                 self.tone(note, duration)
                 self.rotate_animation()
             else:
-                time.sleep_ms(duration)
+                self.sleep_ms(duration)
             pause = int(duration * 1.3)
-            time.sleep_ms(pause - duration)
+            self.sleep_ms(pause - duration)
             self.no_tone()
             if note > 0:
                 self.stop_leds()
 
+        if flash and self.display:
+            self.display.invert(0)
+            self.display.contrast(0xFF)
+
+    def celebrate_record(self):
+        """Schermata nuovo record con scroll diagonale hardware durante la melodia"""
+        if self.display:
+            import ssd1306
+            self.show_screen("record")
+            self.display.scroll_diag(True, 0, self.display.pages - 1, ssd1306.SCROLL_FRAMES_2)
+        self.end_game_melody()
+
+    def title_scroll(self):
+        """Scorre la riga del titolo in lobby senza ritrasmettere il frame"""
+        if self.display:
+            import ssd1306
+            self.display.scroll_h(True, 0, 0, ssd1306.SCROLL_FRAMES_25)
+
+    def level_up_roll(self):
+        """Pausa tra i livelli con il pannello che ruota via start line"""
+        if not self.display:
+            self.sleep_ms(500)
+            return
+        for step in range(1, 9):
+            self.display.start_line(step * 8)
+            self.sleep_ms(62)
+        self.sleep_ms(4)
+
     def update_master_record(self):
-        self.display_text([
-            "TIG-00",
-            "",
-            "Press a button",
-            "",
-            f"Record {self.record}",
-            f"By {self.record_name}"
-        ])
+        """Aggiorna le righe di record/classifica della lobby"""
+        if self.display and self.screen is self.screens["lobby"] and self.refresh_screen():
+            # l'invio parziale ferma lo scroll: ripristina il titolo e riparti
+            self.lobby_title.dirty = True
+            self.refresh_screen()
+            self.title_scroll()
+
+    def scroll_leaderboard(self):
+        """Pagina successiva della classifica in lobby"""
+        board = self.leaderboard
+        if board.changed:
+            board.changed = False
+            self.timer_board_page = self.millis()
+            self.update_master_record()
+        elif board.count > self.LEADERBOARD_PAGE_ROWS and \
+                time.ticks_diff(self.millis(), self.timer_board_page) >= self.LEADERBOARD_PAGE_MS:
+            board.next_page(self.LEADERBOARD_PAGE_ROWS)
+            self.timer_board_page = self.millis()
+            self.update_master_record()
 
     def change_game_state(self, new_state):
         self.game_state = new_state
+        if self.trace:
+            self.trace.state(new_state)
+            if new_state in (self.GameStates.LOBBY, self.GameStates.GAME_OVER):
+                self.trace.flush()
 
         if new_state == self.GameStates.LOBBY:
             self.level = 1
-            if self.online:
-                self.update_master_record()
-            else:
-                self.display_text([
-                    "TIG-00",
-                    "",
-                    "Press a button",
-                    "",
-                    "OFFLINE MODE"
-                ])
+            self.show_screen("lobby")
+            self.title_scroll()
+            self.lobby_animation()
 
         elif new_state == self.GameStates.SEQUENCE_CREATE_UPDATE:
-            if self.online:
-                self.display_text([
-                    f"Level  {self.level}",
-                    "",
-                    f"Record {self.record}",
-                    f"By {self.record_name}"
-                ])
-            else:
-                self.display_text([
-                    f"Level  {self.level}",
-                    "",
-                    "OFFLINE MODE"
-                ])
+            self.shown_color = ""
+            self.show_screen("play")
 
         elif new_state == self.GameStates.SEQUENCE_PRESENTING:
             self.presenting_index = -1
@@ -337,66 +579,64 @@ class TIG00:
             self.player_playing_index = 0
 
         elif new_state == self.GameStates.GAME_OVER:
-            self.display_text([
-                "GAME OVER !"
-            ])
+            self.show_screen("game_over")
 
         elif new_state == self.GameStates.INSERT_NAME:
             self.name_letter = 'A'
             self.record_name = ""
-            self.display_text([
-                "!! NEW RECORD !!",
-                "INSERT NAME",
-                "R:< Y:> B:OK G:DEL"
-            ])
+            self.show_screen("insert_name")
 
     def rewrite_name(self):
         """Aggiorna la visualizzazione del nome durante l'inserimento"""
-        self.display_text([
-            "INSERT NAME",
-            self.record_name,
-            self.name_letter,
-            "R:< Y:> B:OK",
-            "G:DEL *:END"
-        ])
+        self.refresh_screen()
 
     def handle_lobby(self):
         if urandom.randint(0, 400000) == 0:
             self.all_leds_on()
             if self.sound:
                 self.tone(self.tones[urandom.randint(0, len(self.tones) - 1)])
-            time.sleep_ms(500)
+            self.sleep_ms(500)
             self.no_tone()
-            self.stop_leds()
-        else:
-            if self.playing_passed():
-                self.rotate_animation()
+            self.lobby_animation()
+
+        if self.online:
+            self.scroll_leaderboard()
+
+        self.gc.idle()
 
         # Avvia partita se premuto un pulsante
         if self.any_button_pressed():
+            self.last_rank = 0
             self.all_leds_on()
-            time.sleep_ms(1500)
-            self.stop_leds()
-            time.sleep_ms(500)
+            self.sleep_ms(1500)
+            self.fade_out_leds()
+            self.sleep_ms(500)
             # Avvia chiamata async per registrare game_id
             self.game_started_async()
             self.change_game_state(self.GameStates.SEQUENCE_CREATE_UPDATE)
 
     def handle_sequence_create_update(self):
-        for n in range(self.level - 1, self.MAX_SEQUENCE_LENGTH):
-            if n < self.level:
-                self.game_sequence[n] = self.random_button()
-            else:
-                self.game_sequence[n] = self.NO_BUTTON
+        # Tra un livello e l'altro: nessun LED o tono a tempo in corso
+        self.gc.idle(force=True)
+        if self.level == 1:
+            self.seed_sequence(self.draw_seed())
+            self.game_sequence.clear()
+        try:
+            while len(self.game_sequence) < self.level:
+                self.game_sequence.append(self.random_button())
+        except MemoryError:
+            # RAM esaurita: il giocatore ha battuto la macchina
+            print("Sequenza al limite della RAM")
+            self.change_game_state(self.GameStates.GAME_OVER)
+            return
         self.change_game_state(self.GameStates.SEQUENCE_PRESENTING)
 
     def handle_sequence_presenting(self):
         if self.playing_passed() and not self.need_wait:
             if self.pause_passed():
                 self.presenting_index += 1
-                current_button = self.game_sequence[self.presenting_index]
-                if current_button != self.NO_BUTTON:
-                    self.led_on(current_button, True)
+                if self.presenting_index < len(self.game_sequence):
+                    self.led_on(self.game_sequence[self.presenting_index], True)
                     self.need_wait = True
                 else:
                     # Sequenza finita - passa subito a PLAYER_WAITING
@@ -411,19 +651,8 @@ class TIG00:
             self.need_wait = False
 
     def stop_button_label_on_show_sequence(self):
-        if self.online:
-            self.display_text([
-                f"Level  {self.level}",
-                "",
-                f"Record {self.record}",
-                f"By {self.record_name}"
-            ])
-        else:
-            self.display_text([
-                f"Level  {self.level}",
-                "",
-                "OFFLINE MODE"
-            ])
+        self.shown_color = ""
+        self.refresh_screen()
         self.sequence_ended = False
 
     def handle_player_waiting(self):
@@ -433,19 +662,21 @@ class TIG00:
 
         if self.player_waiting_timeout():
             print("Player TIMEOUT")
+            if self.trace:
+                self.trace.timeout()
             self.all_leds_on()
             if self.sound:
                 self.tone(self.tones[4])
-            time.sleep(1)
+            self.sleep_ms(1000)
 
             # Gestione record solo in modalità online
             if self.online:
-                self.is_top_record = self.game_ended(self.game_session, self.level)
+                self.is_top_record = self.end_game_result()
                 if self.is_top_record:
                     self.record = self.level
                     self.name_letter = 'A'
                     self.record_name = ""
-                    self.end_game_melody()
+                    self.celebrate_record()
                     self.change_game_state(self.GameStates.INSERT_NAME)
                     self.rewrite_name()
                 else:
@@ -458,14 +689,14 @@ class TIG00:
                 self.stop_button_label_on_show_sequence()
                 self.stop_leds()
 
-                if self.game_sequence[self.player_playing_index] == self.NO_BUTTON:
-                    time.sleep_ms(500)
+                if self.player_playing_index >= len(self.game_sequence):
+                    self.level_up_roll()
                     self.level += 1
                     self.change_game_state(self.GameStates.SEQUENCE_CREATE_UPDATE)
                 else:
                     button_pressed_found = False
-                    for i, button in enumerate(self.buttons):
-                        if button.is_pressed:
+                    for i in range(len(self.buttons)):
+                        if self.is_button_pressed(i):
                             if self.game_sequence[self.player_playing_index] == i:
                                 self.player_waiting_start()
                                 self.led_on(i, True)
@@ -475,13 +706,13 @@ class TIG00:
                             else:
                                 # Errore - gestione record solo in modalità online
                                 if self.online:
-                                    self.is_top_record = self.game_ended(self.game_session, self.level)
+                                    self.is_top_record = self.end_game_result()
 
                                     if self.is_top_record:
                                         self.record = self.level
                                         self.name_letter = 'A'
                                         self.record_name = ""
-                                        self.end_game_melody()
+                                        self.celebrate_record()
                                         self.change_game_state(self.GameStates.INSERT_NAME)
                                         self.rewrite_name()
                                     else:
@@ -532,7 +763,13 @@ class TIG00:
 
     def handle_game_over(self):
         """Gestisce lo stato GAME OVER"""
-        self.end_game_melody()
+        self.end_game_melody(flash=True)
+        if self.online:
+            self.net.report()
+        self.gc.idle(force=True)
+        self.gc.report()
+        if self.display:
+            self.display.report()
         self.change_game_state(self.GameStates.LOBBY)
 
     def loop(self):
@@ -552,30 +789,68 @@ class TIG00:
         elif self.game_state == self.GameStates.INSERT_NAME:
             self.handle_insert_name()
 
+    def api_request(self, endpoint, method, payload=None, query="", budget_ms=None):
+        """Chiamata a una edge function, in binario (wire) se l'endpoint lo supporta.
+
+        Finche' il formato non e' noto si manda JSON chiedendo il binario in
+        Accept: se il server risponde in binario si passa al binario, se
+        risponde JSON (o 415) l'endpoint resta in JSON.
+        """
+        url = f"{SUPABASE_URL}/functions/v1/{endpoint}{query}"
+        headers = {
+            "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
+            "apikey": SUPABASE_ANON_KEY
+        }
+        binary = self.wire_formats.get(endpoint)
+        if binary is not False:
+            headers["Accept"] = wire.CONTENT_TYPE
+        body = None
+        if payload is not None:
+            if binary:
+                headers["Content-Type"] = wire.CONTENT_TYPE
+                body = wire.encode_request(endpoint, payload)
+            else:
+                headers["Content-Type"] = "application/json"
+                body = json.dumps(payload)
+
+        response = self.net.request(endpoint, method, url, headers, body, budget_ms)
+        if response.status_code == 415 and binary:
+            # binario non piu' accettato: si riprova subito in JSON
+            response.close()
+            self.wire_formats[endpoint] = False
+            return self.api_request(endpoint, method, payload, query, budget_ms)
+        if response.status_code == 200:
+            self.wire_formats[endpoint] = response.content_type.startswith(wire.CONTENT_TYPE)
+        return response
+
+    def api_result(self, endpoint, response, paths, sink=None):
+        """Campi richiesti dalla risposta, qualunque sia il formato"""
+        try:
+            if response.content_type.startswith(wire.CONTENT_TYPE):
+                return wire.extract(endpoint, response.read, paths, sink)
+            return jsonstream.extract(response.read, paths, sink)
+        except ValueError:
+            # body troncato o non valido: per il breaker e' un errore
+            response.fail()
+            raise
+
     def submit_name(self, game_id, nome):
         nome_pulito = nome.rstrip('*')
 
         if self.online and game_id:
             
-            url = f"{SUPABASE_URL}/functions/v1/submit-name"
-
-            headers = {
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "apikey": SUPABASE_ANON_KEY,
-                "Content-Type": "application/json"
-            }
-
-            body = json.dumps({
+            payload = {
                 "game_id": game_id,
                 "player_name": nome_pulito
-            })
+            }
 
+            response = None
             try:
-                response = urequests.post(url, headers=headers, data=body)
+                response = self.api_request("submit-name", "POST", payload,
+                                            budget_ms=self.NET_BUDGET_SUBMIT_NAME)
 
                 if response.status_code == 200:
                     print(f"Nome '{nome}' registrato nella classifica!")
-                    response.close()
                 else:
                     print(f"Errore: {response.status_code}")
                     return False
@@ -583,6 +858,9 @@ class TIG00:
             except Exception as e:
                 print(f"Errore: {e}")
                 return False
+            finally:
+                if response:
+                    response.close()
 
     def get_top_score_async(self):
         """Avvia il caricamento del top score in modo asincrono (fire-and-forget)"""
@@ -592,13 +870,13 @@ class TIG00:
         try:
             # Tenta di usare threading se disponibile
             import _thread
-            _thread.start_new_thread(self.get_top_score_thread, ())
-            print("Chiamata get_top_score in background (threaded)")
+            _thread.start_new_thread(self.get_leaderboard_thread, ())
+            print("Chiamata get_leaderboard in background (threaded)")
         except ImportError:
             # Threading non disponibile - esegui comunque ma non bloccare troppo
             print("Threading non disponibile - chiamata diretta")
             try:
-                self.get_top_score_thread()
+                self.get_leaderboard_thread()
             except:
                 # Ignora errori per non bloccare il gioco
                 print("Errore in get_top_score, continuo comunque")
@@ -607,26 +885,21 @@ class TIG00:
         if not self.online:
             return
 
-        url = f"{SUPABASE_URL}/functions/v1/get-top-score"
-
-        headers = {
-            "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-            "apikey": SUPABASE_ANON_KEY,
-            "Content-Type": "application/json"
-        }
-
         response = None
         try:
             print("get-top-score...")
-            response = urequests.get(url, headers=headers)
+            response = self.api_request("get-top-score", "GET",
+                                        budget_ms=self.NET_BUDGET_LEADERBOARD)
 
             if response.status_code == 200:
-                data = response.json()
-                top_score = data.get("topScore")
-
-                if top_score:
-                    player = top_score.get("player_name")
-                    score = top_score.get("score")
+                data = self.api_result("get-top-score", response, {
+                    ("topScore", "player_name"): "player",
+                    ("topScore", "score"): "score"
+                })
+
+                if "score" in data:
+                    player = data.get("player")
+                    score = data["score"]
                     print(f"Top player: {player} - Score: {score}")
                     self.record_name = player
                     self.record = score
@@ -645,6 +918,56 @@ class TIG00:
             if response:
                 response.close()
 
+    def get_leaderboard_thread(self):
+        """Scarica la top-N compatta; se l'endpoint manca usa get-top-score"""
+        if not self.online:
+            return
+        if self.leaderboard_missing:
+            self.get_top_score_thread()
+            return
+
+        response = None
+        try:
+            print("get-leaderboard...")
+            response = self.api_request("get-leaderboard", "GET",
+                                        query=f"?limit={self.LEADERBOARD_SIZE}",
+                                        budget_ms=self.NET_BUDGET_LEADERBOARD)
+
+            if response.status_code == 200:
+                # righe nella tabella di appoggio: se il body si interrompe
+                # la classifica visibile resta quella precedente
+                rows = [0]
+                leaderboard = self.leaderboard
+                leaderboard.begin()
+
+                def sink(field, i, value):
+                    leaderboard.set_row_field(field, i, value)
+                    rows[0] = max(rows[0], i + 1)
+
+                self.api_result("get-leaderboard", response, {
+                    ("top", jsonstream.ANY, 0): "name",
+                    ("top", jsonstream.ANY, 1): "score"
+                }, sink)
+                if rows[0]:
+                    # nome grezzo, prima che commit() formatti la riga
+                    self.record_name = leaderboard.next_rows[0]
+                    self.record = leaderboard.next_scores[0]
+                leaderboard.commit(rows[0])
+                print(f"Classifica: {self.leaderboard.count} righe")
+            elif response.status_code == 404:
+                response.close()
+                response = None
+                self.leaderboard_missing = True
+                self.get_top_score_thread()
+            else:
+                print(f"Errore: {response.status_code}")
+
+        except Exception as e:
+            print(f"Errore durante get-leaderboard: {e}")
+        finally:
+            if response:
+                response.close()
+
     def game_started_async(self):
         """Avvia la chiamata a start-game in modo asincrono (fire-and-forget)"""
         if not self.online:
@@ -666,72 +989,76 @@ class TIG00:
 
     def _game_started_thread(self):
         self.game_session = None
-        url = f"{SUPABASE_URL}/functions/v1/start-game"
-
-        headers = {
-            "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-            "apikey": SUPABASE_ANON_KEY,
-            "Content-Type": "application/json"
-        }
 
+        response = None
         try:
             print("new game started on server...")
-            response = urequests.post(url, headers=headers)
+            response = self.api_request("start-game", "POST",
+                                        budget_ms=self.NET_BUDGET_START_GAME)
 
             if response.status_code == 200:
-                data = response.json()
+                data = self.api_result("start-game", response, {("game_id",): "game_id"})
                 game_id = data["game_id"]
                 print(f"game started! ID: {game_id}")
                 self.game_session = game_id
-                response.close()
             else:
                 print(f"Error: {response.status_code}")
-                response.close()
 
         except Exception as e:
             print(f"Error in start-game: {e}")
-        
+        finally:
+            if response:
+                response.close()
+
+    def end_game_result(self):
+        """Chiude la partita sul server: True se e' un nuovo record"""
+        result = self.game_ended(self.game_session, self.level)
+        if self.trace:
+            self.trace.net(result)
+        return result
+
     def game_ended(self, game_id, punteggio):
         if self.online and game_id:
             
-            url = f"{SUPABASE_URL}/functions/v1/end-game"
-
-            headers = {
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "apikey": SUPABASE_ANON_KEY,
-                "Content-Type": "application/json"
-            }
-
-            body = json.dumps({
+            payload = {
                 "game_id": game_id,
                 "score": punteggio
-            })
+            }
 
+            response = None
             try:
                 print(f"Salvataggio punteggio: {punteggio}")
-                response = urequests.post(url, headers=headers, data=body)
+                # Budget limitato: se il server non risponde si prosegue offline
+                response = self.api_request("end-game", "POST", payload,
+                                            budget_ms=self.NET_BUDGET_END_GAME)
 
                 if response.status_code == 200:
-                    data = response.json()
-                    response.close()
-                    return data.get("is_top_record")
+                    data = self.api_result("end-game", response, {("is_top_record",): "top"})
+                    # Posizione dalla classifica in cache, senza altre richieste
+                    self.last_rank = self.leaderboard.rank(punteggio)
+                    return data.get("top")
                 else:
                     print(f"Errore: {response.status_code}")
-                    response.close()
                     return False
 
             except Exception as e:
                 print(f"Errore: {e}")
                 return False
+            finally:
+                if response:
+                    response.close()
         else:
 
             return False
 
 
-    def start(self, online):
+    def start(self, online, trace=False):
         print("Game Starting...")
 
         self.online = online
+        if trace:
+            self.trace = input_trace.Recorder()
+            self.trace.session(online)
 
         #GREEN to switch SOUND mode 
         if not self.buttons[2].pin.value(): # and self.is_button_pressed(1):
@@ -740,37 +1067,33 @@ class TIG00:
             self.tone(200, 200)
             time.sleep(2);
 
-        loop_counter = 0
         scoreboard_counter = 0
         try:
-            self.get_top_score_thread()
+            self.get_leaderboard_thread()
             self.change_game_state(self.GameStates.LOBBY)
 
             while True:
                 self.loop()
                 time.sleep_ms(5)  # Small delay for stability
 
-                # Periodic garbage collection every ~10 seconds
-                loop_counter += 1
-                if loop_counter >= 2000:  # ~10s at 5ms per loop
-                    gc.collect()
-                    loop_counter = 0
+                # Solo valvola di sicurezza: le collezioni normali sono in idle()
+                self.gc.poll()
 
                 # Periodic leaderboard loading 
                 if self.game_state == self.GameStates.LOBBY:
                     scoreboard_counter += 1
                     if scoreboard_counter >= 5000: # ~25s at 5ms per loop
                         self.get_top_score_async()
-                    scoreboard_counter = 0
+                        scoreboard_counter = 0
 
         except KeyboardInterrupt:
             print("Game stopped")
 
 
-def start(online):
+def start(online, trace=False):
     try:
         game = TIG00()
-        game.start(online)
+        game.start(online, trace)
     except Exception as e:
         print(f"ERRORE: {type(e).__name__}: {e}")
         import sys
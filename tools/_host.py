@@ -0,0 +1,115 @@
+"""Moduli MicroPython minimi per importare il firmware su CPython.
+
+Usato dagli strumenti in tools/ per eseguire i veri percorsi del firmware
+(chiamate di rete, macchina a stati) sul PC. L'hardware non esiste: pin,
+PWM, I2C e Timer sono inerti.
+"""
+
+import os
+import random
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+
+    def __init__(self, *args, **kwargs):
+        self._value = 1
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = v
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+
+class PWM:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def freq(self, f=None):
+        pass
+
+    def duty_u16(self, d=None):
+        return 0
+
+
+class I2C:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def scan(self):
+        return []
+
+
+class Timer:
+    PERIODIC = 1
+    ONE_SHOT = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def deinit(self):
+        pass
+
+
+def _module(name, **attrs):
+    mod = types.ModuleType(name)
+    mod.__dict__.update(attrs)
+    sys.modules[name] = mod
+    return mod
+
+
+def _ticks_ms():
+    return int(time.monotonic() * 1000)
+
+
+def install(base_url="http://127.0.0.1:54321", anon_key="local-anon-key"):
+    """Registra i moduli finti e rende importabile tig_00_bari"""
+    _module("machine", Pin=Pin, PWM=PWM, I2C=I2C, Timer=Timer)
+    _module("micropython", const=lambda x: x)
+    _module("urandom", randint=random.randint, seed=random.seed,
+            getrandbits=random.getrandbits)
+    _module("lovable", SUPABASE_URL=base_url.rstrip("/"), SUPABASE_ANON_KEY=anon_key)
+    for name, fn in (("ticks_ms", _ticks_ms),
+                     ("ticks_diff", lambda a, b: a - b),
+                     ("ticks_add", lambda a, b: a + b),
+                     ("sleep_ms", lambda ms: time.sleep(ms / 1000))):
+        if not hasattr(time, name):
+            setattr(time, name, fn)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def bare_game(cls, online=True):
+    """Istanza TIG00 senza hardware: solo lo stato usato dai percorsi di rete"""
+    game = cls.__new__(cls)
+    game.online = online
+    game.display = None
+    game.game_session = None
+    game.game_state = cls.GameStates.LOBBY
+    game.level = 1
+    game.record = 0
+    game.record_name = ""
+    game.is_top_record = False
+    game.leaderboard = cls.Leaderboard(cls.LEADERBOARD_SIZE)
+    game.last_rank = 0
+    game.leaderboard_missing = False
+    import net
+    game.net = net.Client()
+    game.wire_formats = {}
+    return game
@@ -0,0 +1,7 @@
+"""Analisi offline delle partite di TIG-00 (CPython + NumPy).
+
+Vedi tools/analyze_games.py per l'uso da riga di comando.
+"""
+
+from .records import GameRecords, from_snapshot, from_trace, simulate
+from .stats import hotspots, reaction_quantiles, recommend_timings, survival
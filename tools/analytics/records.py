@@ -0,0 +1,189 @@
+"""Partite in forma colonnare (array NumPy) e loro sorgenti.
+
+Due tabelle piatte, senza oggetti per partita:
+
+- partite: livello raggiunto (= punteggio), timeout, posizione dell'errore
+  nella sequenza (-1 se sconosciuta)
+- passi: una riga per pressione del giocatore con partita, livello,
+  posizione nella sequenza e tempo di reazione in ms
+
+Le sorgenti sono le tracce del dispositivo (input_trace), lo snapshot del
+server locale (solo punteggi) e file .npz gia' esportati.
+"""
+
+import json
+import sys
+
+import numpy as np
+
+import _host
+
+if _host.ROOT not in sys.path:
+    sys.path.insert(0, _host.ROOT)
+import debounce  # noqa: E402
+import input_trace  # noqa: E402
+
+# stati di TIG00.GameStates (il firmware non si importa senza _host)
+SEQUENCE_CREATE_UPDATE = 1
+PLAYER_WAITING = 3
+GAME_OVER = 4
+INSERT_NAME = 8
+PLAYER_TIMEOUT_MS = 5000
+BUTTONS = 4
+
+
+class GameRecords:
+    def __init__(self, level, timeout, fail_pos, step_game, step_level, step_pos, step_ms):
+        self.level = np.asarray(level, dtype=np.int16)
+        self.timeout = np.asarray(timeout, dtype=bool)
+        self.fail_pos = np.asarray(fail_pos, dtype=np.int16)
+        self.step_game = np.asarray(step_game, dtype=np.int32)
+        self.step_level = np.asarray(step_level, dtype=np.int16)
+        self.step_pos = np.asarray(step_pos, dtype=np.int16)
+        self.step_ms = np.asarray(step_ms, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.level)
+
+    @property
+    def steps(self):
+        return len(self.step_ms)
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], [], [], [], [], [])
+
+    @classmethod
+    def concat(cls, parts):
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        # gli indici di partita dei passi vanno spostati di blocco in blocco
+        offsets = np.cumsum([0] + [len(p) for p in parts[:-1]])
+        return cls(np.concatenate([p.level for p in parts]),
+                   np.concatenate([p.timeout for p in parts]),
+                   np.concatenate([p.fail_pos for p in parts]),
+                   np.concatenate([p.step_game + o for p, o in zip(parts, offsets)]),
+                   np.concatenate([p.step_level for p in parts]),
+                   np.concatenate([p.step_pos for p in parts]),
+                   np.concatenate([p.step_ms for p in parts]))
+
+    def save(self, path):
+        np.savez(path, level=self.level, timeout=self.timeout,
+                            fail_pos=self.fail_pos, step_game=self.step_game,
+                            step_level=self.step_level, step_pos=self.step_pos,
+                            step_ms=self.step_ms)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["level"], data["timeout"], data["fail_pos"], data["step_game"],
+                       data["step_level"], data["step_pos"], data["step_ms"])
+
+
+def _debounced(events, mask):
+    """Eventi con le maschere grezze sostituite dai fronti di pressione filtrati.
+
+    Ripete il campionamento del loop (un campione ogni LOOP_MS) con lo stesso
+    contatore verticale del firmware: i rimbalzi non diventano pressioni.
+    """
+    counter = debounce.VerticalCounter(BUTTONS)
+    counter.reset(mask)
+    out = [e for e in events if e[1] != input_trace.EV_BUTTONS]
+    raw = [e for e in events if e[1] == input_trace.EV_BUTTONS]
+    for n, (t, _, mask, _) in enumerate(raw):
+        end = raw[n + 1][0] if n + 1 < len(raw) else t + 4 * input_trace.LOOP_MS
+        # dopo 4 campioni uguali il contatore non cambia piu'
+        for k in range(4):
+            sample_t = t + k * input_trace.LOOP_MS
+            if k and sample_t >= end:
+                break
+            pressed, _ = counter.update(mask)
+            if pressed:
+                out.append((sample_t, input_trace.EV_BUTTONS, pressed, None))
+    # nello stesso giro di loop la lettura dei pulsanti precede il cambio di stato
+    out.sort(key=lambda e: (e[0], e[1] != input_trace.EV_BUTTONS))
+    return out
+
+
+def _trace_game(recorded, steps, game):
+    """Livello, timeout e posizione dell'errore di una partita registrata"""
+    # lo stato del livello 1 e' registrato prima del SEED, fuori dalla partita
+    level = 1
+    waiting = False
+    timeout = False
+    last = 0
+    pos = 0
+    for t, kind, payload, _ in _debounced(recorded["events"], recorded["mask"]):
+        if kind == input_trace.EV_STATE:
+            if payload == SEQUENCE_CREATE_UPDATE:
+                level += 1
+                waiting = False
+            elif payload == PLAYER_WAITING:
+                waiting = True
+                last = t
+                pos = 0
+            elif payload in (GAME_OVER, INSERT_NAME) and waiting:
+                return level, timeout, pos if timeout else pos - 1
+        elif kind == input_trace.EV_TIMEOUT:
+            timeout = True
+        elif kind == input_trace.EV_BUTTONS and waiting:
+            steps.append((game, level, pos, t - last))
+            last = t
+            pos += 1
+    return level, False, -1
+
+
+def from_trace(path):
+    """Partite di una traccia del dispositivo (<path>.0 / <path>.1)"""
+    games = input_trace.split_games(input_trace.read_events(path))
+    rows = []
+    steps = []
+    for i, recorded in enumerate(games):
+        rows.append(_trace_game(recorded, steps, i))
+    if not rows:
+        return GameRecords.empty()
+    level, timeout, fail_pos = zip(*rows)
+    step_columns = zip(*steps) if steps else ([], [], [], [])
+    return GameRecords(level, timeout, fail_pos, *step_columns)
+
+
+def from_snapshot(path):
+    """Punteggi dallo snapshot di tools/supabase_local.py (senza passi)"""
+    with open(path) as f:
+        games = json.load(f)["games"]
+    level = np.fromiter((g["score"] for g in games.values() if g["score"] is not None),
+                        dtype=np.int16)
+    n = len(level)
+    return GameRecords(level, np.zeros(n, bool), np.full(n, -1), [], [], [], [])
+
+
+def simulate(n, seed=0, hazard=0.08, growth=0.012, reaction_ms=600, p_timeout=0.15):
+    """n partite sintetiche, generate per intero con operazioni vettoriali.
+
+    Serve a provare le analisi su milioni di partite senza dati reali: il
+    rischio di errore per livello cresce linearmente, i tempi di reazione
+    sono log-normali e piu' lenti verso la fine della sequenza.
+    """
+    rng = np.random.default_rng(seed)
+    levels = np.arange(1, 256)
+    risk = np.minimum(hazard + growth * (levels - 1), 0.95)
+    # livello raggiunto: inversa della funzione di sopravvivenza
+    survival = np.cumprod(1 - risk)
+    level = (np.searchsorted(-survival, -rng.random(n)) + 1).astype(np.int16)
+    timeout = rng.random(n) < p_timeout
+    fail_pos = (rng.random(n) * level).astype(np.int16)
+
+    # passi: livelli completati 1..L-1 per intero, poi quelli del livello L
+    done = (level.astype(np.int64) - 1) * level // 2
+    per_game = done + fail_pos + ~timeout
+    step_game = np.repeat(np.arange(n, dtype=np.int32), per_game)
+    start = np.repeat(np.cumsum(per_game) - per_game, per_game)
+    idx = np.arange(len(step_game)) - start
+    # indice triangolare -> (livello, posizione)
+    step_level = ((1 + np.sqrt(1 + 8 * idx)) // 2).astype(np.int64)
+    step_pos = idx - (step_level - 1) * step_level // 2
+    slow = 1 + 0.03 * step_pos
+    step_ms = rng.lognormal(np.log(reaction_ms), 0.35, len(idx)) * slow
+    return GameRecords(level, timeout, fail_pos, step_game, step_level, step_pos,
+                       np.minimum(step_ms, PLAYER_TIMEOUT_MS - 1))
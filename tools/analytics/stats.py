@@ -0,0 +1,138 @@
+"""Analisi vettoriali su GameRecords: nessun ciclo Python per partita."""
+
+import numpy as np
+
+# tempi di base del firmware (TIG00.playing_passed / pause_passed)
+ON_MS, ON_PENALTY = 500, 400
+PAUSE_MS, PAUSE_PENALTY = 300, 200
+TIMEOUT_MS = 5000
+
+
+def penalty(levels, base):
+    """Stessa curva di TIG00.penalty, per un array di livelli"""
+    levels = np.asarray(levels, dtype=np.float64)
+    difficulty = -1.0 / (levels * levels) + 0.5
+    return np.where(difficulty > 0, (difficulty * base).astype(np.int64), 0)
+
+
+def survival(records, max_level=None):
+    """Per livello 1..max_level: partite arrivate, sopravvivenza e hazard.
+
+    hazard[L] e' la frazione di partite che, arrivate al livello L, finiscono
+    proprio li'.
+    """
+    if max_level is None:
+        max_level = int(records.level.max()) if len(records) else 0
+    ended = np.bincount(np.clip(records.level, 0, max_level + 1), minlength=max_level + 2)
+    # partite che hanno raggiunto almeno il livello L
+    reached = np.cumsum(ended[::-1])[::-1]
+    levels = np.arange(1, max_level + 1)
+    reached = reached[1:max_level + 1]
+    ended = ended[1:max_level + 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hazard = np.where(reached > 0, ended / np.maximum(reached, 1), np.nan)
+    return levels, reached, reached / max(len(records), 1), hazard
+
+
+def reaction_quantiles(records, quantiles=(0.5, 0.9, 0.99), max_level=None):
+    """Quantili del tempo di reazione per livello (righe) e quantile (colonne).
+
+    Un unico ordinamento di chiavi livello << 32 | tempo: i quantili di ogni
+    gruppo sono letti direttamente agli indici giusti dell'array ordinato.
+    """
+    if max_level is None:
+        max_level = int(records.step_level.max()) if records.steps else 0
+    level = records.step_level
+    keep = (level >= 1) & (level <= max_level)
+    level = level[keep]
+    key = (level.astype(np.int64) << 32) | records.step_ms[keep]
+    key.sort()
+    ms = key & 0xFFFFFFFF
+    counts = np.bincount(level, minlength=max_level + 1)[1:]
+    starts = np.cumsum(counts) - counts
+    q = np.asarray(quantiles)
+    # indice del quantile (metodo "lower") dentro ciascun gruppo
+    idx = starts[:, None] + np.floor(q[None, :] * np.maximum(counts - 1, 0)[:, None]).astype(np.int64)
+    out = np.full((max_level, len(q)), np.nan)
+    has = counts > 0
+    out[has] = ms[idx[has]]
+    return np.arange(1, max_level + 1), counts, out
+
+
+def hotspots(records, max_level=None, min_attempts=20, top=10):
+    """Punti (livello, posizione) dove si sbaglia di piu', in proporzione ai tentativi.
+
+    Restituisce un array strutturato ordinato per tasso di errore.
+    """
+    known = records.fail_pos >= 0
+    if max_level is None:
+        max_level = int(records.level.max()) if len(records) else 0
+    width = max_level + 1
+    cells = (max_level + 1) * width
+    fail_cell = records.level[known].astype(np.int64) * width + records.fail_pos[known]
+    fails = np.bincount(fail_cell, minlength=cells)[:cells]
+    # tentativi: ogni pressione registrata, piu' i timeout (nessuna pressione)
+    step_cell = records.step_level.astype(np.int64) * width + records.step_pos
+    attempts = np.bincount(step_cell, minlength=cells)[:cells]
+    timeouts = known & records.timeout
+    attempts += np.bincount(records.level[timeouts].astype(np.int64) * width
+                            + records.fail_pos[timeouts], minlength=cells)[:cells]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(attempts >= min_attempts, fails / np.maximum(attempts, 1), 0.0)
+    best = np.argsort(rate)[::-1][:top]
+    best = best[rate[best] > 0]
+    table = np.zeros(len(best), dtype=[("level", "i2"), ("pos", "i2"), ("fails", "i8"),
+                                       ("attempts", "i8"), ("rate", "f8")])
+    table["level"] = best // width
+    table["pos"] = best % width
+    table["fails"] = fails[best]
+    table["attempts"] = attempts[best]
+    table["rate"] = rate[best]
+    return table
+
+
+def recommend_timings(records, target_hazard=0.1, max_level=None, min_games=50,
+                      max_change=0.25, timeout_quantile=0.99, timeout_margin=1.5):
+    """Tabella per livello con i tempi attuali e quelli consigliati.
+
+    - acceso/pausa: dove l'hazard osservato supera target_hazard il livello
+      e' troppo difficile e i tempi si allungano (e viceversa), con
+      fattore sqrt(hazard / target) limitato a +-max_change
+    - timeout: quantile alto del tempo di reazione per margine, mai oltre
+      il timeout attuale del firmware
+
+    I livelli con meno di min_games partite restano ai valori attuali.
+    """
+    levels, reached, alive, hazard = survival(records, max_level)
+    max_level = len(levels)
+    target = np.broadcast_to(np.asarray(target_hazard, dtype=np.float64), levels.shape)
+    on_now = ON_MS - penalty(levels, ON_PENALTY)
+    pause_now = PAUSE_MS - penalty(levels, PAUSE_PENALTY)
+
+    ok = (reached >= min_games) & np.isfinite(hazard)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = np.sqrt(np.where(ok, hazard, target) / target)
+    factor = np.clip(np.nan_to_num(factor, nan=1.0), 1 - max_change, 1 + max_change)
+    factor[~ok] = 1.0
+
+    _, counts, q = reaction_quantiles(records, (timeout_quantile,), max_level)
+    timeout = np.full(max_level, TIMEOUT_MS, dtype=np.int64)
+    has = (counts >= min_games) & np.isfinite(q[:, 0])
+    # arrotondato ai 100 ms
+    timeout[has] = np.minimum(np.ceil(q[has, 0] * timeout_margin / 100) * 100, TIMEOUT_MS)
+
+    table = np.zeros(max_level, dtype=[("level", "i2"), ("games", "i8"), ("survival", "f8"),
+                                       ("hazard", "f8"), ("on_ms", "i4"), ("on_new", "i4"),
+                                       ("pause_ms", "i4"), ("pause_new", "i4"),
+                                       ("timeout_ms", "i4"), ("timeout_new", "i4")])
+    table["level"] = levels
+    table["games"] = reached
+    table["survival"] = alive
+    table["hazard"] = hazard
+    table["on_ms"] = on_now
+    table["on_new"] = np.round(on_now * factor)
+    table["pause_ms"] = pause_now
+    table["pause_new"] = np.round(pause_now * factor)
+    table["timeout_ms"] = TIMEOUT_MS
+    table["timeout_new"] = timeout
+    return table
@@ -0,0 +1,107 @@
+"""Analizza partite registrate e propone i tempi per livello.
+
+    python tools/analyze_games.py --trace trace --snapshot scores.json
+    python tools/analyze_games.py --simulate 1000000 --save games.npz
+    python tools/analyze_games.py --npz games.npz --csv timings.csv
+
+Stampa curva di sopravvivenza, tempi di reazione, punti critici della
+sequenza e la tabella dei tempi consigliati (anche in CSV con --csv).
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import analytics
+
+
+def load(args):
+    parts = []
+    for path in args.trace:
+        parts.append(analytics.from_trace(path))
+    for path in args.snapshot:
+        parts.append(analytics.from_snapshot(path))
+    for path in args.npz:
+        parts.append(analytics.GameRecords.load(path))
+    if args.simulate:
+        parts.append(analytics.simulate(args.simulate, args.seed))
+    return analytics.GameRecords.concat(parts)
+
+
+def print_survival(records, max_level):
+    levels, reached, alive, hazard = analytics.survival(records, max_level)
+    print("livello  partite  sopravv.  hazard")
+    for row in zip(levels, reached, alive, hazard):
+        print("%7d %8d %9.3f %7.3f" % row)
+
+
+def print_reactions(records, max_level):
+    levels, counts, q = analytics.reaction_quantiles(records, (0.5, 0.9, 0.99), max_level)
+    print("livello   passi    p50    p90    p99 (ms)")
+    for level, count, (p50, p90, p99) in zip(levels, counts, q):
+        if count:
+            print("%7d %7d %6.0f %6.0f %6.0f" % (level, count, p50, p90, p99))
+
+
+def print_hotspots(records, max_level):
+    table = analytics.hotspots(records, max_level)
+    print("livello  posiz.  errori  tentativi  tasso")
+    for row in table:
+        print("%7d %7d %7d %10d %6.3f" % tuple(row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", action="append", default=[],
+                        help="prefisso di una traccia del dispositivo (ripetibile)")
+    parser.add_argument("--snapshot", action="append", default=[],
+                        help="snapshot JSON di supabase_local.py (solo punteggi)")
+    parser.add_argument("--npz", action="append", default=[], help="partite gia' esportate")
+    parser.add_argument("--simulate", type=int, default=0, help="aggiunge N partite sintetiche")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-level", type=int, default=20)
+    parser.add_argument("--target-hazard", type=float, default=0.1,
+                        help="frazione di partite che si vuole finiscano a ogni livello")
+    parser.add_argument("--min-games", type=int, default=50)
+    parser.add_argument("--save", help="salva le partite caricate in .npz")
+    parser.add_argument("--csv", help="scrive la tabella dei tempi consigliati")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    records = load(args)
+    if not len(records):
+        print("Nessuna partita")
+        return 1
+    print(f"{len(records)} partite, {records.steps} passi "
+          f"({time.perf_counter() - t0:.2f}s caricamento)")
+    if args.save:
+        records.save(args.save)
+
+    t0 = time.perf_counter()
+    print()
+    print_survival(records, args.max_level)
+    if records.steps:
+        print()
+        print_reactions(records, args.max_level)
+        print()
+        print_hotspots(records, args.max_level)
+
+    table = analytics.recommend_timings(records, args.target_hazard, args.max_level,
+                                        args.min_games)
+    print()
+    print("livello  acceso  ->   pausa  ->   timeout ->")
+    for row in table:
+        print("%7d %7d %5d %7d %5d %9d %5d" % (row["level"], row["on_ms"], row["on_new"],
+                                               row["pause_ms"], row["pause_new"],
+                                               row["timeout_ms"], row["timeout_new"]))
+    if args.csv:
+        np.savetxt(args.csv, table, delimiter=",", header=",".join(table.dtype.names),
+                   comments="", fmt=["%d", "%d", "%.4f", "%.4f"] + ["%d"] * 6)
+    print(f"\nanalisi {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
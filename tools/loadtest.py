@@ -0,0 +1,158 @@
+"""Generatore di carico: una flotta di TIG-00 simulati contro il backend.
+
+Ogni dispositivo e' un'istanza TIG00 vera (senza hardware) che passa per gli
+stessi metodi del firmware: _game_started_thread, game_ended, submit_name e
+get_leaderboard_thread (che ricade su get_top_score_thread). Le durate di
+partita seguono la curva di difficolta' di TIG00.penalty; lobby e refresh
+della classifica seguono i tempi di start().
+
+    python tools/loadtest.py --base-url http://127.0.0.1:54321 --devices 200 \\
+        --duration 120 --time-scale 20
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import _host
+
+LOBBY_REFRESH_MS = 25000   # scoreboard_counter in TIG00.start
+LOOP_MS = 5
+
+
+class EndpointStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.outcomes = {}
+
+    def record(self, endpoint, elapsed_ms, outcome):
+        """Hook net.Client.on_complete: esito ok/http_error/error/timeout/skipped"""
+        with self.lock:
+            if outcome != "skipped":
+                self.latencies.setdefault(endpoint, []).append(elapsed_ms)
+            counts = self.outcomes.setdefault(endpoint, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    def report(self, elapsed):
+        rows = [f"{'endpoint':<16}{'req':>8}{'req/s':>9}{'err%':>8}{'tmo%':>8}{'skip':>6}"
+                f"{'p50ms':>8}{'p90ms':>8}{'p99ms':>8}{'maxms':>8}"]
+        for endpoint in sorted(self.outcomes):
+            counts = self.outcomes[endpoint]
+            lat = sorted(self.latencies.get(endpoint, [])) or [0]
+            n = len(lat)
+            sent = sum(counts.values()) - counts.get("skipped", 0)
+            pct = lambda q: lat[min(n - 1, int(q * n))]
+            # errori: risposte non 200 e chiamate fallite (timeout a parte)
+            err = 100 * (counts.get("error", 0) + counts.get("http_error", 0)) / max(1, sent)
+            tmo = 100 * counts.get("timeout", 0) / max(1, sent)
+            rows.append(f"{endpoint:<16}{sent:>8}{sent / elapsed:>9.1f}{err:>8.2f}{tmo:>8.2f}"
+                        f"{counts.get('skipped', 0):>6}"
+                        f"{pct(0.5):>8}{pct(0.9):>8}{pct(0.99):>8}{lat[-1]:>8}")
+        return "\n".join(rows)
+
+
+class Device:
+    def __init__(self, tig, args, seed, stats):
+        self.game = _host.bare_game(tig.TIG00)
+        self.game.net.on_complete = stats.record
+        self.args = args
+        self.rng = random.Random(seed)
+        self.last_refresh = 0.0
+
+    def sleep(self, ms, deadline):
+        time.sleep(min(ms / 1000 / self.args.time_scale, max(0.0, deadline - time.monotonic())))
+
+    def game_length_ms(self, levels):
+        """Presentazione + risposta per ogni livello con i tempi del firmware"""
+        total = 0
+        for level in range(1, levels + 1):
+            self.game.level = level
+            step = (500 - self.game.penalty(400)) + (300 - self.game.penalty(200))
+            reaction = self.rng.gauss(self.args.reaction_ms, self.args.reaction_ms / 4)
+            total += level * (step + max(150, reaction)) + 500
+        return total + 5000  # timeout o errore finale + melodia
+
+    def lobby(self, deadline):
+        idle = self.rng.expovariate(1 / self.args.lobby_ms)
+        end = time.monotonic() + idle / 1000 / self.args.time_scale
+        while time.monotonic() < min(end, deadline):
+            if time.monotonic() - self.last_refresh >= LOBBY_REFRESH_MS / 1000 / self.args.time_scale:
+                self.game.get_leaderboard_thread()
+                self.last_refresh = time.monotonic()
+            self.sleep(LOBBY_REFRESH_MS / 5, min(end, deadline))
+
+    def play(self, deadline):
+        game = self.game
+        game._game_started_thread()
+        for attempt in range(self.args.retries):
+            if game.game_session:
+                break
+            self.sleep(self.args.retry_ms * (attempt + 1), deadline)
+            game._game_started_thread()
+
+        levels = 1
+        while levels < self.args.max_level and self.rng.random() < self.args.p_continue:
+            levels += 1
+        self.sleep(self.game_length_ms(levels), deadline)
+
+        game.is_top_record = game.game_ended(game.game_session, levels)
+        if game.is_top_record:
+            self.sleep(self.rng.uniform(5000, 20000), deadline)  # inserimento nome
+            game.submit_name(game.game_session, "LOAD" + str(self.rng.randint(0, 999)))
+            game.get_leaderboard_thread()
+            self.last_refresh = time.monotonic()
+
+    def run(self, deadline):
+        self.game.get_leaderboard_thread()
+        self.last_refresh = time.monotonic()
+        while time.monotonic() < deadline:
+            self.lobby(deadline)
+            if time.monotonic() < deadline:
+                self.play(deadline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:54321")
+    parser.add_argument("--anon-key", default="local-anon-key")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=60, help="secondi reali")
+    parser.add_argument("--time-scale", type=float, default=10,
+                        help="quante volte piu' veloce del tempo reale del dispositivo")
+    parser.add_argument("--lobby-ms", type=float, default=30000, help="attesa media in lobby")
+    parser.add_argument("--reaction-ms", type=float, default=600)
+    parser.add_argument("--p-continue", type=float, default=0.85,
+                        help="probabilita' di superare un livello")
+    parser.add_argument("--max-level", type=int, default=40)
+    parser.add_argument("--retries", type=int, default=2, help="retry di start-game")
+    parser.add_argument("--retry-ms", type=float, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="mostra le stampe del firmware")
+    args = parser.parse_args()
+
+    _host.install(args.base_url, args.anon_key)
+    import tig_00_bari
+
+    stats = EndpointStats()
+    devices = [Device(tig_00_bari, args, args.seed * 100003 + i, stats)
+               for i in range(args.devices)]
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.monotonic()
+    deadline = start + args.duration
+    with quiet, ThreadPoolExecutor(max_workers=args.devices) as pool:
+        for future in [pool.submit(d.run, deadline) for d in devices]:
+            future.result()
+    elapsed = time.monotonic() - start
+
+    print(f"{args.devices} dispositivi, {elapsed:.1f}s reali, time-scale x{args.time_scale:g}")
+    print(stats.report(elapsed))
+
+
+if __name__ == "__main__":
+    main()
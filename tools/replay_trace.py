@@ -0,0 +1,47 @@
+"""Rigioca sul PC le partite di una traccia registrata sul dispositivo.
+
+Copiare trace.0 / trace.1 dalla flash (es. `mpremote cp :trace.0 .`) e poi:
+
+    python tools/replay_trace.py trace
+
+Ogni partita viene rieseguita dalla vera macchina a stati TIG00 con un
+orologio virtuale; esce con codice 1 se una partita diverge dalla traccia.
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+
+import _host
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="prefisso dei file di traccia (senza .0/.1)")
+    parser.add_argument("--verbose", action="store_true", help="mostra le stampe del firmware")
+    args = parser.parse_args()
+
+    _host.install()
+    import tig_00_bari
+    import input_trace
+
+    games = input_trace.split_games(input_trace.read_events(args.path))
+    if not games:
+        print("Nessuna partita nella traccia")
+        return 1
+
+    diverged = 0
+    for recorded in games:
+        quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with quiet:
+            replay = input_trace.Replay(tig_00_bari.TIG00(), recorded)
+            ok = replay.run()
+        replay.report()
+        diverged += not ok
+    print(f"{len(games)} partite, {diverged} divergenti")
+    return 1 if diverged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
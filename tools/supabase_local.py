@@ -0,0 +1,330 @@
+"""Server locale che sostituisce le edge function Supabase usate da TIG-00.
+
+Implementa start-game, end-game, submit-name, get-top-score e
+get-leaderboard con le stesse forme di richiesta/risposta che usa
+tig_00_bari.py, per i test e per gli eventi in LAN. Gira su CPython (asyncio), nessuna dipendenza esterna.
+Oltre al JSON parla il formato binario di wire.py (Content-Type
+application/x-tig) se il client lo chiede; --json-only lo disattiva.
+
+    python tools/supabase_local.py --port 54321 --snapshot scores.json
+
+Sul dispositivo basta puntare SUPABASE_URL in lovable.py a
+http://<ip-del-pc>:54321
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import sys
+import time
+import uuid
+from urllib.parse import parse_qsl
+
+import _host
+
+if _host.ROOT not in sys.path:
+    sys.path.insert(0, _host.ROOT)
+import wire  # noqa: E402
+
+FUNCTIONS_PREFIX = "/functions/v1/"
+MAX_BODY = 16 * 1024
+MAX_LEADERBOARD = 50
+
+
+class Leaderboard:
+    """Partite in memoria con indice ordinato per punteggio.
+
+    _index contiene chiavi (-score, seq, game_id) ordinate: il primo elemento
+    e' il record (confronto O(1) per is_top_record). L'inserimento con
+    bisect.insort trova il posto in O(log n) ma sposta la lista in O(n):
+    un memmove, trascurabile anche con milioni di partite.
+    A parita' di punteggio vince chi l'ha fatto prima (seq minore).
+    """
+
+    def __init__(self):
+        self.games = {}
+        self._index = []
+        self._seq = 0
+        self.dirty = False
+
+    def start_game(self):
+        game_id = str(uuid.uuid4())
+        self.games[game_id] = {"score": None, "player_name": None, "seq": None,
+                               "started": time.time()}
+        self.dirty = True
+        return game_id
+
+    def end_game(self, game_id, score):
+        game = self.games.get(game_id)
+        if game is None:
+            raise KeyError(game_id)
+        if game["score"] is not None:
+            # end-game ripetuto (retry del dispositivo): stessa risposta
+            return game["is_top_record"]
+        top = self.top()
+        is_top_record = score > 0 and (top is None or score > top["score"])
+        self._seq += 1
+        game.update(score=score, seq=self._seq, is_top_record=is_top_record)
+        bisect.insort(self._index, (-score, self._seq, game_id))
+        self.dirty = True
+        return is_top_record
+
+    def submit_name(self, game_id, player_name):
+        game = self.games.get(game_id)
+        if game is None or game["score"] is None:
+            raise KeyError(game_id)
+        game["player_name"] = player_name
+        self.dirty = True
+
+    def top(self):
+        if not self._index:
+            return None
+        game_id = self._index[0][2]
+        game = self.games[game_id]
+        return {"player_name": game["player_name"] or "", "score": game["score"]}
+
+    def top_n(self, n):
+        """Prime n partite come righe compatte [nome, punteggio]"""
+        rows = []
+        for _, _, game_id in self._index[:n]:
+            game = self.games[game_id]
+            rows.append([game["player_name"] or "", game["score"]])
+        return rows
+
+    def snapshot_data(self):
+        """Copia dello stato da salvare: i dict delle partite cambiano ancora"""
+        self.dirty = False
+        return {"seq": self._seq,
+                "games": {game_id: dict(game) for game_id, game in self.games.items()}}
+
+    def snapshot(self, path):
+        write_snapshot(self.snapshot_data(), path)
+
+    def load(self, path):
+        with open(path) as f:
+            data = json.load(f)
+        self._seq = data["seq"]
+        self.games = data["games"]
+        self._index = sorted((-g["score"], g["seq"], game_id)
+                             for game_id, g in self.games.items()
+                             if g["score"] is not None)
+        self.dirty = False
+
+
+class EdgeFunctions:
+    """Routing delle edge function: ogni handler riceve il body JSON"""
+
+    def __init__(self, board, anon_key=None, binary=True):
+        self.board = board
+        self.anon_key = anon_key
+        self.binary = binary
+        self.routes = {
+            ("POST", "start-game"): self.start_game,
+            ("POST", "end-game"): self.end_game,
+            ("POST", "submit-name"): self.submit_name,
+            ("GET", "get-top-score"): self.get_top_score,
+            ("GET", "get-leaderboard"): self.get_leaderboard,
+        }
+
+    def authorized(self, headers):
+        if not self.anon_key:
+            return True
+        return (headers.get("authorization") == f"Bearer {self.anon_key}"
+                or headers.get("apikey") == self.anon_key)
+
+    def dispatch(self, method, path, headers, body):
+        """(status, payload, endpoint se la risposta va in binario)"""
+        if not path.startswith(FUNCTIONS_PREFIX):
+            return 404, {"error": "not found"}, None
+        name, _, query = path[len(FUNCTIONS_PREFIX):].partition("?")
+        handler = self.routes.get((method, name))
+        if handler is None:
+            return 404, {"error": "not found"}, None
+        if not self.authorized(headers):
+            return 401, {"error": "unauthorized"}, None
+        binary_in = headers.get("content-type", "").startswith(wire.CONTENT_TYPE)
+        if binary_in and not self.binary:
+            return 415, {"error": "unsupported media type"}, None
+        try:
+            if binary_in:
+                data = wire.decode_request(name, body)
+            else:
+                data = json.loads(body) if body else dict(parse_qsl(query))
+        except ValueError:
+            return 400, {"error": "invalid body"}, None
+        if not isinstance(data, dict):
+            return 400, {"error": "invalid body"}, None
+        status, payload = self.handle(handler, data)
+        binary_out = self.binary and status == 200 \
+            and wire.CONTENT_TYPE in headers.get("accept", "")
+        return status, payload, name if binary_out else None
+
+    def handle(self, handler, data):
+        # i campi obbligatori mancanti sono 400: KeyError resta per game_id sconosciuti
+        missing = [f for f in REQUIRED.get(handler.__name__, ()) if f not in data]
+        if missing:
+            return 400, {"error": f"missing {', '.join(missing)}"}
+        try:
+            return handler(data)
+        except KeyError:
+            return 404, {"error": "unknown game_id"}
+        except (TypeError, ValueError):
+            return 400, {"error": "invalid request"}
+
+    def start_game(self, data):
+        return 200, {"game_id": self.board.start_game()}
+
+    def end_game(self, data):
+        score = int(data["score"])
+        return 200, {"is_top_record": self.board.end_game(data["game_id"], score)}
+
+    def submit_name(self, data):
+        name = str(data["player_name"])[:8]
+        self.board.submit_name(data["game_id"], name)
+        return 200, {"success": True}
+
+    def get_top_score(self, data):
+        return 200, {"topScore": self.board.top()}
+
+    def get_leaderboard(self, data):
+        limit = max(0, min(int(data.get("limit", 10)), MAX_LEADERBOARD))
+        return 200, {"top": self.board.top_n(limit)}
+
+
+REQUIRED = {
+    "end_game": ("game_id", "score"),
+    "submit_name": ("game_id", "player_name"),
+}
+
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized",
+           404: "Not Found", 413: "Payload Too Large", 415: "Unsupported Media Type"}
+
+
+async def handle_connection(functions, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, path, version = request_line.decode("latin-1").split()
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                status, payload, binary = 400, {"error": "invalid content-length"}, None
+                keep_alive = False
+            elif length > MAX_BODY:
+                status, payload, binary = 413, {"error": "body too large"}, None
+                keep_alive = False
+            else:
+                body = await reader.readexactly(length) if length else b""
+                status, payload, binary = functions.dispatch(method, path, headers, body)
+                connection = headers.get("connection", "").lower()
+                keep_alive = (version == "HTTP/1.1" and connection != "close") \
+                    or connection == "keep-alive"
+
+            if binary:
+                out, content_type = wire.encode_response(binary, payload), wire.CONTENT_TYPE
+            else:
+                out, content_type = json.dumps(payload).encode(), "application/json"
+            writer.write(
+                f"{version} {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(out)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                .encode() + out)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+def write_snapshot(data, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+async def snapshot_task(board, path, interval):
+    # json.dump di tutte le partite gira in un thread, il loop resta libero
+    while True:
+        await asyncio.sleep(interval)
+        if not board.dirty:
+            continue
+        write = asyncio.ensure_future(
+            asyncio.to_thread(write_snapshot, board.snapshot_data(), path))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            # lo snapshot finale non deve sovrapporsi a questa scrittura
+            await write
+            raise
+        except OSError as e:
+            board.dirty = True
+            print(f"Snapshot non salvato: {e}")
+
+
+async def serve(args):
+    board = Leaderboard()
+    if args.snapshot and os.path.exists(args.snapshot):
+        board.load(args.snapshot)
+        print(f"Caricate {len(board.games)} partite da {args.snapshot}")
+    functions = EdgeFunctions(board, args.anon_key, binary=not args.json_only)
+
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(functions, r, w),
+        args.host, args.port, backlog=args.backlog)
+    print(f"Edge functions locali su http://{args.host}:{args.port}{FUNCTIONS_PREFIX}")
+
+    tasks = []
+    if args.snapshot:
+        tasks.append(asyncio.create_task(
+            snapshot_task(board, args.snapshot, args.snapshot_interval)))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if args.snapshot and board.dirty:
+            board.snapshot(args.snapshot)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--anon-key", help="se impostata, richiede Authorization/apikey")
+    parser.add_argument("--snapshot", help="file JSON per salvare/ricaricare le partite")
+    parser.add_argument("--snapshot-interval", type=float, default=10.0)
+    parser.add_argument("--backlog", type=int, default=4096)
+    parser.add_argument("--json-only", action="store_true",
+                        help="rifiuta il formato binario (415), come un server non aggiornato")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("Server fermato")
+
+
+if __name__ == "__main__":
+    main()
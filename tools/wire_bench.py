@@ -0,0 +1,94 @@
+"""Confronto byte e tempi tra JSON e formato binario (wire.py) per endpoint.
+
+Per ogni endpoint misura i byte di richiesta e risposta (body + header che
+cambiano tra i due formati) e il tempo di encode/decode dei percorsi usati
+dal firmware: json.dumps / jsonstream.extract contro wire.encode_request /
+wire.extract.
+
+    python tools/wire_bench.py --repeat 20000
+
+I tempi sono quelli di CPython: sul Pico il rapporto conta piu' dei valori.
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+
+import _host
+
+if _host.ROOT not in sys.path:
+    sys.path.insert(0, _host.ROOT)
+import jsonstream  # noqa: E402
+import wire  # noqa: E402
+
+GAME_ID = "0196e917-1506-4eb3-9749-942772129c6c"
+
+# (richiesta, risposta, campi letti dal firmware) come in tig_00_bari.py
+CASES = {
+    "start-game": (None, {"game_id": GAME_ID}, {("game_id",): "game_id"}),
+    "end-game": ({"game_id": GAME_ID, "score": 17}, {"is_top_record": True},
+                 {("is_top_record",): "top"}),
+    "submit-name": ({"game_id": GAME_ID, "player_name": "ANNA"}, {"success": True}, {}),
+    "get-top-score": (None, {"topScore": {"player_name": "ANNA", "score": 17}},
+                      {("topScore", "player_name"): "player", ("topScore", "score"): "score"}),
+    "get-leaderboard": (None, {"top": [[f"P{i:02d}", 40 - i] for i in range(10)]},
+                        {("top", jsonstream.ANY, 0): "name", ("top", jsonstream.ANY, 1): "score"}),
+}
+
+JSON_HEADER = "Content-Type: application/json\r\n"
+WIRE_HEADER = f"Content-Type: {wire.CONTENT_TYPE}\r\n"
+# api_request manda Accept a ogni richiesta binaria, GET compresi
+ACCEPT_HEADER = f"Accept: {wire.CONTENT_TYPE}\r\n"
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) * 1e6 / repeat
+
+
+def sink(name, index, value):
+    pass
+
+
+def bench(endpoint, repeat):
+    request, response, paths = CASES[endpoint]
+    json_req = json.dumps(request).encode() if request is not None else b""
+    wire_req = wire.encode_request(endpoint, request)
+    json_resp = json.dumps(response).encode()
+    wire_resp = wire.encode_response(endpoint, response)
+    # i GET non hanno body e quindi nemmeno Content-Type nella richiesta
+    has_body = request is not None
+    json_bytes = len(json_req) + len(json_resp) + len(JSON_HEADER) * (1 + has_body)
+    wire_bytes = len(wire_req) + len(wire_resp) + len(WIRE_HEADER) * (1 + has_body) \
+        + len(ACCEPT_HEADER)
+
+    json_us = timed(lambda: json.dumps(request), repeat) if has_body else 0.0
+    json_us += timed(lambda: jsonstream.extract(io.BytesIO(json_resp).read, paths, sink), repeat)
+    wire_us = timed(lambda: wire.encode_request(endpoint, request), repeat) if has_body else 0.0
+    wire_us += timed(lambda: wire.extract(endpoint, io.BytesIO(wire_resp).read, paths, sink),
+                     repeat)
+    return json_bytes, wire_bytes, json_us, wire_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<16} {'json B':>7} {'wire B':>7} {'json us':>8} {'wire us':>8}")
+    totals = [0, 0, 0.0, 0.0]
+    for endpoint in CASES:
+        row = bench(endpoint, args.repeat)
+        totals = [t + v for t, v in zip(totals, row)]
+        print(f"{endpoint:<16} {row[0]:>7} {row[1]:>7} {row[2]:>8.1f} {row[3]:>8.1f}")
+    print(f"{'totale':<16} {totals[0]:>7} {totals[1]:>7} {totals[2]:>8.1f} {totals[3]:>8.1f}")
+    print(f"byte -{100 - 100 * totals[1] / totals[0]:.0f}%, "
+          f"tempo -{100 - 100 * totals[3] / totals[2]:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
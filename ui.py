@@ -0,0 +1,106 @@
+# Widget in retained mode sopra ssd1306.SSD1306
+#
+# Ogni widget legge il proprio valore da una funzione legata allo stato di
+# gioco; Screen.update() ridisegna solo i widget il cui valore e' cambiato,
+# ciascuno nel proprio rettangolo, e invia al display solo quelle aree.
+
+CHAR_W = 8
+LINE_H = 10
+_UNSET = object()
+
+
+def row(n):
+    """Coordinata y della riga n (righe da LINE_H pixel)"""
+    return n * LINE_H
+
+
+class Widget:
+    def __init__(self, x, y, w, h, source):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.source = source
+        self.value = _UNSET
+        self.dirty = True
+
+    def poll(self):
+        value = self.source() if callable(self.source) else self.source
+        if value != self.value:
+            self.value = value
+            self.dirty = True
+        return self.dirty
+
+    def draw(self, fb):
+        fb.fill_rect(self.x, self.y, self.w, self.h, 0)
+        self.render(fb)
+        self.dirty = False
+
+    def render(self, fb):
+        pass
+
+
+class Label(Widget):
+    """Testo fisso o legato a una funzione"""
+
+    def __init__(self, x, y, source, chars=16):
+        super().__init__(x, y, chars * CHAR_W, 8, source)
+
+    def render(self, fb):
+        fb.text(str(self.value), self.x, self.y, 1)
+
+
+class Counter(Widget):
+    """Prefisso fisso + valore numerico"""
+
+    def __init__(self, x, y, prefix, source, chars=16):
+        super().__init__(x, y, chars * CHAR_W, 8, source)
+        self.prefix = prefix
+
+    def render(self, fb):
+        fb.text(f"{self.prefix}{self.value}", self.x, self.y, 1)
+
+
+class Selector(Widget):
+    """Opzione corrente in negativo, con la precedente e la successiva ai lati"""
+
+    def __init__(self, x, y, options, source):
+        super().__init__(x, y, 5 * CHAR_W, 8, source)
+        self.options = options
+
+    def render(self, fb):
+        options = self.options
+        i = options.find(self.value)
+        n = len(options)
+        x = self.x
+        fb.text(options[(i - 1) % n], x, self.y, 1)
+        fb.fill_rect(x + 2 * CHAR_W - 1, self.y, CHAR_W + 2, 8, 1)
+        fb.text(options[i], x + 2 * CHAR_W, self.y, 0)
+        fb.text(options[(i + 1) % n], x + 4 * CHAR_W, self.y, 1)
+
+
+class Screen:
+    def __init__(self, display, widgets):
+        self.display = display
+        self.widgets = widgets
+
+    def show(self):
+        """Ridisegno completo (cambio schermata)"""
+        display = self.display
+        display.fill(0)
+        for widget in self.widgets:
+            widget.poll()
+            widget.draw(display)
+        display.show()
+
+    def update(self):
+        """Ridisegna i widget cambiati; restituisce quanti ne ha inviati"""
+        display = self.display
+        count = 0
+        for widget in self.widgets:
+            if widget.poll():
+                widget.draw(display)
+                display.show_area(widget.x, widget.x + widget.w - 1,
+                                  widget.y >> 3, (widget.y + widget.h - 1) >> 3)
+                count += 1
+        return count
@@ -0,0 +1,210 @@
+# Formato binario compatto per le edge function (alternativa al JSON)
+#
+# Stessi campi del JSON, in ordine fisso e senza nomi:
+#   "s" stringa UTF-8 con lunghezza su 1 byte, "H" intero 0..65535 LE,
+#   "?" booleano su 1 byte
+#   (campi,)  oggetto opzionale: 1 byte di presenza poi i campi (null = 0)
+#   [tipi]    lista di righe compatte: 1 byte di conteggio poi le righe
+# Usato sia dal firmware sia da tools/ (server locale e benchmark): encode e
+# decode lavorano sugli stessi dict che viaggiano in JSON. Il firmware legge
+# le risposte con extract(), che come jsonstream non costruisce l'albero.
+
+import struct
+
+import jsonstream
+
+CONTENT_TYPE = "application/x-tig"
+
+REQUESTS = {
+    "start-game": (),
+    "end-game": (("game_id", "s"), ("score", "H")),
+    "submit-name": (("game_id", "s"), ("player_name", "s")),
+    "get-top-score": (),
+    "get-leaderboard": (),
+}
+
+RESPONSES = {
+    "start-game": (("game_id", "s"),),
+    "end-game": (("is_top_record", "?"),),
+    "submit-name": (("success", "?"),),
+    "get-top-score": (("topScore", (("player_name", "s"), ("score", "H"))),),
+    "get-leaderboard": (("top", ["s", "H"]),),
+}
+
+
+def _put(out, kind, value):
+    if kind == "s":
+        data = (value or "").encode()[:255]
+        out.append(len(data))
+        out.extend(data)
+    elif kind == "H":
+        out.extend(struct.pack("<H", value or 0))
+    elif kind == "?":
+        out.append(1 if value else 0)
+    elif isinstance(kind, tuple):
+        out.append(0 if value is None else 1)
+        if value is not None:
+            _pack(out, kind, value)
+    else:
+        rows = (value or ())[:255]
+        out.append(len(rows))
+        for row in rows:
+            for i in range(len(kind)):
+                _put(out, kind[i], row[i])
+
+
+def _pack(out, fields, obj):
+    for name, kind in fields:
+        _put(out, kind, obj.get(name))
+
+
+def _get(data, i, kind):
+    if kind == "s":
+        end = i + 1 + data[i]
+        if end > len(data):
+            raise IndexError
+        return bytes(data[i + 1:end]).decode(), end
+    if kind == "H":
+        if i + 2 > len(data):
+            raise IndexError
+        return struct.unpack_from("<H", data, i)[0], i + 2
+    if kind == "?":
+        return data[i] != 0, i + 1
+    if isinstance(kind, tuple):
+        if not data[i]:
+            return None, i + 1
+        return _unpack(data, i + 1, kind)
+    count = data[i]
+    i += 1
+    rows = []
+    for _ in range(count):
+        row = []
+        for sub in kind:
+            value, i = _get(data, i, sub)
+            row.append(value)
+        rows.append(row)
+    return rows, i
+
+
+def _unpack(data, i, fields):
+    obj = {}
+    for name, kind in fields:
+        obj[name], i = _get(data, i, kind)
+    return obj, i
+
+
+def _decode(fields, data):
+    try:
+        obj, end = _unpack(data, 0, fields)
+    except IndexError:
+        raise ValueError("messaggio binario troncato")
+    if end != len(data):
+        raise ValueError("messaggio binario troppo lungo")
+    return obj
+
+
+def encode_request(endpoint, obj):
+    out = bytearray()
+    _pack(out, REQUESTS[endpoint], obj or {})
+    return bytes(out)
+
+
+def decode_request(endpoint, data):
+    return _decode(REQUESTS[endpoint], data)
+
+
+def encode_response(endpoint, obj):
+    out = bytearray()
+    _pack(out, RESPONSES[endpoint], obj)
+    return bytes(out)
+
+
+def decode_response(endpoint, data):
+    return _decode(RESPONSES[endpoint], data)
+
+
+class _Fields:
+    """Lettura in streaming di una risposta, con i campi verso found/sink"""
+
+    def __init__(self, read, paths, sink, chunk):
+        self.read = read
+        self.paths = paths
+        self.sink = sink
+        self.chunk = chunk
+        self.buf = b""
+        self.i = 0
+        self.path = []
+        self.found = {}
+
+    def take(self, n):
+        # n byte esatti (n <= 255), letti a blocchi dal body
+        while len(self.buf) - self.i < n:
+            data = self.read(self.chunk)
+            if not data:
+                raise ValueError("messaggio binario troncato")
+            self.buf = self.buf[self.i:] + data
+            self.i = 0
+        out = self.buf[self.i:self.i + n]
+        self.i += n
+        return out
+
+    def wanted(self):
+        path = self.path
+        for wanted in self.paths:
+            if len(wanted) != len(path):
+                continue
+            for i in range(len(path)):
+                w = wanted[i]
+                if w != path[i] and not (w == jsonstream.ANY and isinstance(path[i], int)):
+                    break
+            else:
+                return wanted
+        return None
+
+    def value(self, kind):
+        if kind == "s":
+            data = self.take(self.take(1)[0])
+            wanted = self.wanted()
+            if wanted is not None:
+                self.emit(wanted, jsonstream.cut_str(bytearray(data)))
+        elif kind == "H":
+            value = struct.unpack("<H", self.take(2))[0]
+            self.emit(self.wanted(), value)
+        elif kind == "?":
+            self.emit(self.wanted(), self.take(1)[0] != 0)
+        elif isinstance(kind, tuple):
+            if self.take(1)[0]:
+                self.fields(kind)
+        else:
+            for row in range(self.take(1)[0]):
+                self.path.append(row)
+                for i in range(len(kind)):
+                    self.path.append(i)
+                    self.value(kind[i])
+                    self.path.pop()
+                self.path.pop()
+
+    def fields(self, fields):
+        for name, kind in fields:
+            self.path.append(name)
+            self.value(kind)
+            self.path.pop()
+
+    def emit(self, wanted, value):
+        if wanted is None:
+            return
+        name = self.paths[wanted]
+        if jsonstream.ANY in wanted:
+            if self.sink is not None:
+                self.sink(name, self.path[wanted.index(jsonstream.ANY)], value)
+        else:
+            self.found[name] = value
+
+
+def extract(endpoint, read, paths, sink=None, chunk=jsonstream.CHUNK):
+    """Come jsonstream.extract(), ma su una risposta binaria letta con read(n)"""
+    fields = _Fields(read, paths, sink, chunk)
+    fields.fields(RESPONSES[endpoint])
+    if fields.i < len(fields.buf) or read(1):
+        raise ValueError("messaggio binario troppo lungo")
+    return fields.found